@@ -1,7 +1,14 @@
 from flask import Flask
 from celery import Celery
 from app import events
-from app.extensions import db, migrate
+from app.extensions import db, migrate, Session
+from app.database import engine_options
+from app.cache import create_cache
+from app.metrics import init_metrics
+from app.profiling import init_profiling
+from app.kong_client.client import KongAdminClient
+from app.kong_client.async_client import AsyncKongAdminClient
+from app.kong_client.breaker import CircuitBreaker, reject_writes_while_kong_unavailable, retry_after_while_kong_unavailable
 from config import Config
 
 
@@ -12,9 +19,23 @@ def create_app(config_class=Config):
     app = Flask(__name__)
     app.config.from_object(config_class)
     
+    app.config.setdefault("SQLALCHEMY_ENGINE_OPTIONS", engine_options(app.config))
+    
     db.init_app(app)
     migrate.init_app(app, db)
     
+    with app.app_context():
+        Session.configure(bind=db.engine)
+    
+    init_metrics(app)
+    
+    app.extensions["kong_breaker"] = CircuitBreaker.from_config(app.config)
+    app.extensions["kong_client"] = KongAdminClient.from_config(app.config, app.extensions["kong_breaker"])
+    app.extensions["async_kong_client"] = AsyncKongAdminClient.from_config(app.config, app.extensions["kong_breaker"])
+    app.before_request(reject_writes_while_kong_unavailable)
+    app.after_request(retry_after_while_kong_unavailable)
+    app.extensions["cache"] = create_cache(app.config)
+    
     celery.conf.update(app.config)
     
     from app.api import api as api_bp
@@ -23,4 +44,15 @@ def create_app(config_class=Config):
     from app.plugin import plugin as plugin_bp
     app.register_blueprint(plugin_bp)
     
+    from app.state import state as state_bp
+    app.register_blueprint(state_bp)
+    
+    from app.admin import admin as admin_bp
+    app.register_blueprint(admin_bp, url_prefix="/admin")
+    
+    from app.jobs import jobs as jobs_bp
+    app.register_blueprint(jobs_bp)
+    
+    init_profiling(app)
+    
     return app
\ No newline at end of file
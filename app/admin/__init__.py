@@ -0,0 +1,5 @@
+from flask import Blueprint
+
+admin = Blueprint("admin", __name__)
+
+from app.admin import routes
\ No newline at end of file
@@ -0,0 +1,164 @@
+import asyncio
+from urllib.parse import urlsplit
+
+from flask import current_app as app
+
+from app.extensions import db
+from app.models import API, Plugin, PluginAPIConfiguration, PluginConfig
+from app.kong_client.async_client import get_async_kong_client
+from app.state.reconcile import is_subset
+
+
+DEFAULT_PORTS = {"http": 80, "https": 443, "grpc": 80, "grpcs": 443}
+
+
+def normalize_url(url):
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    port = parts.port if parts.port not in (None, DEFAULT_PORTS.get(scheme)) else None
+    return f"{scheme}://{host}{f':{port}' if port else ''}{parts.path or ''}"
+
+
+def service_url(service):
+    protocol = service.get("protocol") or "http"
+    port = service.get("port")
+    port = port if port not in (None, DEFAULT_PORTS.get(protocol)) else None
+    return f"{protocol}://{(service.get('host') or '').lower()}{f':{port}' if port else ''}{service.get('path') or ''}"
+
+
+def _foreign_id(entity, key):
+    return (entity.get(key) or {}).get("id")
+
+
+async def fetch_kong_state(kong, page_size):
+    """Page through ``/services``, ``/routes`` and ``/plugins`` concurrently."""
+    services, routes, plugins = await asyncio.gather(
+        kong.list_all_in_kong("/services", page_size),
+        kong.list_all_in_kong("/routes", page_size),
+        kong.list_all_in_kong("/plugins", page_size)
+    )
+    return (
+        {service["id"]: service for service in services},
+        {route["id"]: route for route in routes},
+        {plugin["id"]: plugin for plugin in plugins}
+    )
+
+
+def load_db_state():
+    apis = db.session.execute(
+        db.select(
+            API.id, API.name, API.url, API.path, API.headers, API.methods,
+            API.enabled, API.kong_service_id, API.kong_route_id
+        )
+    ).all()
+    plugin_configs = db.session.execute(
+        db.select(
+            PluginAPIConfiguration.api_id, Plugin.name, PluginConfig.config,
+            PluginAPIConfiguration.enabled, PluginAPIConfiguration.kong_plugin_id
+        )
+        .join(Plugin, Plugin.id == PluginAPIConfiguration.plugin_id)
+        .join(PluginConfig, PluginConfig.hash == PluginAPIConfiguration.config_hash)
+    ).all()
+    return apis, plugin_configs
+
+
+def _changed(fields):
+    return {field: {"db": db_value, "kong": kong_value} for field, (db_value, kong_value) in fields.items() if db_value != kong_value}
+
+
+def compare(apis, plugin_configs, services, routes, plugins):
+    """Join both sides on the Kong ids through dict lookups and classify every object."""
+    report = {kind: {"missing": [], "orphaned": [], "changed": []} for kind in ("services", "routes", "plugins")}
+    service_ids_by_api = {}
+
+    for api in apis:
+        service_ids_by_api[api.id] = api.kong_service_id
+        service = services.get(api.kong_service_id)
+
+        if service is None:
+            report["services"]["missing"].append({"api_id": api.id, "kong_service_id": api.kong_service_id})
+        else:
+            fields = _changed({
+                "name": (api.name, service.get("name")),
+                "url": (normalize_url(api.url), service_url(service)),
+                "enabled": (api.enabled, service.get("enabled", True))
+            })
+            if fields:
+                report["services"]["changed"].append({"api_id": api.id, "kong_service_id": api.kong_service_id, "fields": fields})
+
+        route = routes.get(api.kong_route_id)
+
+        if route is None:
+            report["routes"]["missing"].append({"api_id": api.id, "kong_route_id": api.kong_route_id})
+        else:
+            fields = _changed({
+                "paths": ([api.path], route.get("paths")),
+                "methods": (sorted(api.methods or []), sorted(route.get("methods") or [])),
+                "headers": (api.headers or None, route.get("headers") or None),
+                "service": (api.kong_service_id, _foreign_id(route, "service"))
+            })
+            if fields:
+                report["routes"]["changed"].append({"api_id": api.id, "kong_route_id": api.kong_route_id, "fields": fields})
+
+    for plugin_config in plugin_configs:
+        plugin = plugins.get(plugin_config.kong_plugin_id)
+
+        if plugin is None:
+            report["plugins"]["missing"].append({
+                "api_id": plugin_config.api_id,
+                "name": plugin_config.name,
+                "kong_plugin_id": plugin_config.kong_plugin_id
+            })
+            continue
+
+        fields = _changed({
+            "name": (plugin_config.name, plugin.get("name")),
+            "enabled": (plugin_config.enabled, plugin.get("enabled", True)),
+            "service": (service_ids_by_api.get(plugin_config.api_id), _foreign_id(plugin, "service"))
+        })
+        if not is_subset(plugin_config.config, plugin.get("config")):
+            fields["config"] = {"db": plugin_config.config, "kong": plugin.get("config")}
+        if fields:
+            report["plugins"]["changed"].append({
+                "api_id": plugin_config.api_id,
+                "kong_plugin_id": plugin_config.kong_plugin_id,
+                "fields": fields
+            })
+
+    known = {
+        "services": {api.kong_service_id for api in apis},
+        "routes": {api.kong_route_id for api in apis},
+        "plugins": {plugin_config.kong_plugin_id for plugin_config in plugin_configs}
+    }
+    for kind, entities in (("services", services), ("routes", routes), ("plugins", plugins)):
+        for entity_id, entity in entities.items():
+            if entity_id not in known[kind]:
+                report[kind]["orphaned"].append({
+                    "id": entity_id,
+                    "name": entity.get("name"),
+                    **({"service_id": _foreign_id(entity, "service")} if kind != "services" else {})
+                })
+
+    return report
+
+
+async def detect_drift():
+    # Kong is paged on the client loop while this thread reads the database.
+    kong = get_async_kong_client()
+    pending = kong.submit(fetch_kong_state(kong, app.config["DRIFT_PAGE_SIZE"]))
+    try:
+        apis, plugin_configs = load_db_state()
+    except Exception:
+        pending.cancel()
+        raise
+    kong_state = await asyncio.wrap_future(pending)
+    report = compare(apis, plugin_configs, *kong_state)
+
+    return {
+        "summary": {
+            kind: {category: len(items) for category, items in categories.items()}
+            for kind, categories in report.items()
+        },
+        **report
+    }
@@ -0,0 +1,111 @@
+from flask import request, jsonify, send_from_directory, current_app as app
+
+from app.admin import admin
+from app.admin.drift import detect_drift
+from app.extensions import db
+from app.kong_client.breaker import get_breaker
+from app.models import RollbackTask
+from app.profiling import list_profiles
+from app.pagination import keyset_page, next_cursor, parse_limit
+from app.serializers import columns, rows_to_dicts, json_response
+
+
+ROLLBACK_STATUSES = ("pending", "queued", "running", "retrying", "succeeded", "failed", "superseded")
+
+
+@admin.route("/drift")
+async def get_drift():
+    try:
+        return json_response(await detect_drift())
+    
+    except Exception as e:
+        return jsonify({
+            "error": "Internal server error.",
+            "message": str(e)
+        }), 500
+        
+    finally:
+        db.session.close()
+
+
+@admin.route("/kong")
+def get_kong_health():
+    return json_response(get_breaker().snapshot(app.config["KONG_READ_TIMEOUT"])), 200
+
+
+@admin.route("/profiles")
+def get_profiles():
+    return json_response({"profiles": list_profiles(app)}), 200
+
+
+@admin.route("/profiles/<name>")
+def download_profile(name):
+    return send_from_directory(app.config["PROFILING_DIR"], name, as_attachment=True)
+
+
+@admin.route("/rollbacks")
+def list_rollbacks():
+    try:
+        limit = parse_limit(request.args.get("limit"))
+        statement = db.select(*columns(RollbackTask))
+        
+        status = request.args.get("status")
+        if status:
+            if status not in ROLLBACK_STATUSES:
+                raise ValueError(f"The 'status' parameter must be one of: {', '.join(ROLLBACK_STATUSES)}.")
+            statement = statement.where(RollbackTask.status == status)
+        
+        entity_key = request.args.get("entity")
+        if entity_key:
+            statement = statement.where(RollbackTask.entity_key == entity_key)
+        
+        name = request.args.get("name")
+        if name:
+            statement = statement.where(RollbackTask.name.endswith(name, autoescape=True))
+        
+        rollbacks_list = db.session.execute(
+            keyset_page(statement, RollbackTask, limit, request.args.get("cursor"))
+        ).all()
+        
+        return json_response({
+            "rollbacks": rows_to_dicts(rollbacks_list[:limit]),
+            "next_cursor": next_cursor(rollbacks_list, limit)
+        }), 200
+    
+    except ValueError as e:
+        return jsonify({
+            "error": "Invalid data.",
+            "message": str(e)
+        }), 400
+    
+    except Exception as e:
+        return jsonify({
+            "error": "Internal server error.",
+            "message": str(e)
+        }), 500
+        
+    finally:
+        db.session.close()
+
+
+@admin.route("/rollbacks/<task_id>")
+def get_rollback(task_id):
+    try:
+        rollback_task = db.session.get(RollbackTask, task_id)
+        
+        if rollback_task is None:
+            return jsonify({
+                "error": "Not found.",
+                "message": "No rollback task found with the provided ID."
+            }), 404
+        
+        return json_response(rollback_task.to_dict()), 200
+    
+    except Exception as e:
+        return jsonify({
+            "error": "Internal server error.",
+            "message": str(e)
+        }), 500
+        
+    finally:
+        db.session.close()
\ No newline at end of file
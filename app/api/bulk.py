@@ -0,0 +1,382 @@
+import asyncio
+import logging
+import uuid
+
+from flask import jsonify, current_app as app
+from sqlalchemy import or_
+
+from app.extensions import db
+from app.models import API
+from app.cache import invalidate_api
+from app.kong_client.async_client import get_async_kong_client
+from app.async_tasks import (
+    rollback_for_api_creation_failure,
+    rollback_for_api_update_failure,
+    rollback_for_route_update_failure,
+    rollback_for_api_delete_failure
+)
+
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+UNIQUE_FIELDS = ("name", "url", "path")
+
+
+def _original_service_data(api):
+    return {
+        "name": api.name,
+        "url": api.url,
+        "enabled": api.enabled
+    }
+
+
+def _original_route_data(api):
+    return {
+        "paths": [api.path],
+        "headers": api.headers,
+        "methods": api.methods
+    }
+
+
+def _failure(status, error, message=None):
+    return {
+        "status": status,
+        "error": error,
+        **({"message": message} if message else {})
+    }
+
+
+def validate_bulk_request(data):
+    """Check the envelope of a bulk request, returning an error response if it is unusable."""
+    if not isinstance(data, dict):
+        raise ValueError("Invalid JSON data.")
+    
+    operations = data.get("operations")
+    
+    if not isinstance(operations, list) or not operations:
+        return jsonify({
+            "error": "Invalid data.",
+            "message": "The 'operations' field must be a non-empty list."
+        }), 400
+        
+    if len(operations) > app.config["BULK_MAX_OPERATIONS"]:
+        return jsonify({
+            "error": "Too many operations.",
+            "message": f"A bulk request accepts at most {app.config['BULK_MAX_OPERATIONS']} operations."
+        }), 400
+
+
+def validate_operations(operations):
+    """Check the shape of every operation and return per-index failures."""
+    failures = {}
+
+    for index, operation in enumerate(operations):
+        if not isinstance(operation, dict):
+            failures[index] = _failure(400, "Invalid data.", "Each operation must be a JSON object.")
+            continue
+
+        op = operation.get("op")
+        data = operation.get("data") or {}
+
+        if op not in ("create", "update", "delete"):
+            failures[index] = _failure(400, "Invalid data.", "The 'op' field must be one of: create, update, delete.")
+            continue
+
+        if not isinstance(data, dict):
+            failures[index] = _failure(400, "Invalid data.", "The 'data' field must be a JSON object.")
+            continue
+
+        if op in ("update", "delete") and not operation.get("api"):
+            failures[index] = _failure(400, "Missing required field.", "The required field 'api' must be provided.")
+            continue
+
+        if op == "create":
+            missing_fields = [field for field in ["url", "path"] if not data.get(field)]
+            if missing_fields:
+                failures[index] = _failure(400, "Missing required fields.", f"The following required fields are missing: {', '.join(missing_fields)}.")
+                continue
+
+        if op != "delete":
+            allowed_fields = app.config["ALLOW_FIELDS_FOR_CREATE_API" if op == "create" else "ALLOW_FIELDS_FOR_UPDATE_API"]
+            unknown_fields = [field for field in data.keys() if field not in allowed_fields]
+            if unknown_fields:
+                failures[index] = _failure(400, "schema violation", f"Unknown fields: {', '.join(unknown_fields)}.")
+
+    return failures
+
+
+def load_targets(operations, failures):
+    """Resolve every update/delete target by id or name with a single SELECT."""
+    identifiers = {
+        operation["api"] for index, operation in enumerate(operations)
+        if index not in failures and operation["op"] != "create"
+    }
+
+    if not identifiers:
+        return {}
+
+    apis = db.session.execute(
+        db.select(API).where(
+            or_(
+                API.id.in_(identifiers),
+                API.name.in_(identifiers)
+            )
+        )
+    ).scalars().all()
+
+    targets = {}
+    for api in apis:
+        targets[api.id] = api
+        if api.name:
+            targets.setdefault(api.name, api)
+
+    claimed = set()
+    for index, operation in enumerate(operations):
+        if index in failures or operation["op"] == "create":
+            continue
+        if operation["api"] not in targets:
+            failures[index] = _failure(404, "Not found.", "No API found with the provided identifier.")
+        elif targets[operation["api"]].id in claimed:
+            failures[index] = _failure(409, "Conflict.", "The API is already targeted by an earlier operation in this request.")
+        else:
+            claimed.add(targets[operation["api"]].id)
+
+    return targets
+
+
+def check_uniqueness(operations, targets, failures):
+    """Check name/url/path uniqueness for the whole batch with one set-based query.
+
+    Values are checked against the table and against earlier operations of the
+    same batch, so two creates cannot claim the same path.
+    """
+    wanted = {field: set() for field in UNIQUE_FIELDS}
+
+    for index, operation in enumerate(operations):
+        if index in failures or operation["op"] == "delete":
+            continue
+        for field in UNIQUE_FIELDS:
+            value = (operation.get("data") or {}).get(field)
+            if value:
+                wanted[field].add(value)
+
+    owners = {field: {} for field in UNIQUE_FIELDS}
+
+    if any(wanted.values()):
+        rows = db.session.execute(
+            db.select(API.id, API.name, API.url, API.path).where(
+                or_(*(
+                    getattr(API, field).in_(values)
+                    for field, values in wanted.items() if values
+                ))
+            )
+        ).all()
+
+        for row in rows:
+            for field in UNIQUE_FIELDS:
+                value = getattr(row, field)
+                if value in wanted[field]:
+                    owners[field][value] = row.id
+
+    for index, operation in enumerate(operations):
+        if index in failures or operation["op"] == "delete":
+            continue
+
+        own_id = targets[operation["api"]].id if operation["op"] == "update" else None
+        data = operation.get("data") or {}
+
+        for field in UNIQUE_FIELDS:
+            value = data.get(field)
+            if value and owners[field].get(value, own_id) != own_id:
+                failures[index] = _failure(
+                    409,
+                    f"UNIQUE violation detected on '{field}=\"{value}\"'",
+                    f"The {field} '{value}' conflict with an existing API."
+                )
+                break
+        else:
+            for field in UNIQUE_FIELDS:
+                value = data.get(field)
+                if value:
+                    owners[field][value] = own_id or f"pending:{index}"
+
+
+async def create_in_kong(kong, data):
+    create_service_data = {
+        "url": data.get("url"),
+        **({"name": data.get("name")} if data.get("name") else {})
+    }
+
+    kong_service_id, service_error = await kong.create_service_in_kong(create_service_data)
+
+    if service_error:
+        return _failure(500, "Service creation failed.", service_error)
+
+    create_route_data = {
+        "paths": [data.get("path")],
+        **({"headers": data.get("headers")} if data.get("headers") else {}),
+        **({"methods": data.get("methods")} if data.get("methods") else {})
+    }
+
+    kong_route_id, route_error = await kong.create_route_in_kong(kong_service_id, create_route_data)
+
+    if route_error:
+        rollback_for_api_creation_failure.delay(kong_service_id)
+        return _failure(500, "Route creation failed.", route_error)
+
+    return {
+        "kong_service_id": kong_service_id,
+        "kong_route_id": kong_route_id
+    }
+
+
+async def update_in_kong(kong, api, data):
+    changes = {}
+    update_service_data = {
+        field: data.get(field) for field in ["name", "url", "enabled"]
+        if data.get(field)
+    }
+    update_route_data = {
+        **({"paths": [data.get("path")]} if data.get("path") else {}),
+        **({"headers": data.get("headers")} if data.get("headers") else {}),
+        **({"methods": data.get("methods")} if data.get("methods") else {})
+    }
+
+    updates = {}
+    if update_service_data:
+        updates["service"] = kong.update_service_in_kong(api.kong_service_id, update_service_data)
+    if update_route_data:
+        updates["route"] = kong.update_route_in_kong(api.kong_route_id, update_route_data)
+
+    outcomes = dict(zip(updates, await asyncio.gather(*updates.values())))
+    failed = [entity for entity, (status, _) in outcomes.items() if status == "failure"]
+
+    if failed:
+        if "service" in outcomes and "service" not in failed:
+            rollback_for_api_update_failure.delay(api.kong_service_id, _original_service_data(api))
+        if "route" in outcomes and "route" not in failed:
+            rollback_for_route_update_failure.delay(api.kong_route_id, _original_route_data(api))
+        return _failure(500, f"{failed[0].capitalize()} update failed.", outcomes[failed[0]][1])
+
+    changes.update(update_service_data)
+    for key, value in update_route_data.items():
+        changes["path" if key == "paths" else key] = data.get("path") if key == "paths" else value
+
+    return {"changes": changes}
+
+
+async def delete_in_kong(kong, api):
+    # Kong refuses to delete a service that still has routes.
+    route_status, route_error = await kong.delete_route_in_kong(api.kong_route_id)
+
+    if route_status == "failure":
+        return _failure(500, "Route deletion failed.", route_error)
+
+    service_status, service_error = await kong.delete_service_in_kong(api.kong_service_id)
+
+    if service_status == "failure":
+        rollback_for_api_delete_failure.delay(api.kong_service_id, api.id, _original_route_data(api))
+        return _failure(500, "Service deletion failed.", service_error)
+
+    return {}
+
+
+async def run_in_kong(operations, targets, failures):
+    kong = get_async_kong_client()
+    pending = [index for index in range(len(operations)) if index not in failures]
+
+    def call(operation):
+        if operation["op"] == "create":
+            return create_in_kong(kong, operation.get("data") or {})
+        if operation["op"] == "update":
+            return update_in_kong(kong, targets[operation["api"]], operation.get("data") or {})
+        return delete_in_kong(kong, targets[operation["api"]])
+
+    outcomes = await kong.gather(
+        [call(operations[index]) for index in pending],
+        limit=app.config["BULK_KONG_CONCURRENCY"]
+    )
+    return dict(zip(pending, outcomes))
+
+
+def _apply(operation, targets, outcome):
+    data = operation.get("data") or {}
+
+    if operation["op"] == "create":
+        new_api = API(
+            id=str(uuid.uuid4()),
+            name=data.get("name") if data.get("name") else None,
+            url=data.get("url"),
+            path=data.get("path"),
+            headers=data.get("headers") if data.get("headers") else None,
+            methods=data.get("methods") if data.get("methods") else None,
+            kong_service_id=outcome["kong_service_id"],
+            kong_route_id=outcome["kong_route_id"]
+        )
+        db.session.add(new_api)
+        return new_api.id, []
+
+    api = targets[operation["api"]]
+    stale_names = [api.name, outcome.get("changes", {}).get("name")]
+    # Targets are detached during the Kong phase; write through a session copy so
+    # the detached one keeps the original values for compensation.
+    row = db.session.merge(api, load=False)
+    if operation["op"] == "update":
+        for key, value in outcome["changes"].items():
+            setattr(row, key, value)
+    else:
+        db.session.delete(row)
+    return api.id, stale_names
+
+
+def _compensate(operation, targets, outcome):
+    """Undo the Kong side of an item whose DB write could not be committed."""
+    if operation["op"] == "create":
+        rollback_for_api_creation_failure.delay(outcome["kong_service_id"], outcome["kong_route_id"])
+    elif operation["op"] == "update":
+        api = targets[operation["api"]]
+        if {"name", "url", "enabled"} & outcome["changes"].keys():
+            rollback_for_api_update_failure.delay(api.kong_service_id, _original_service_data(api))
+        if {"path", "headers", "methods"} & outcome["changes"].keys():
+            rollback_for_route_update_failure.delay(api.kong_route_id, _original_route_data(api))
+    else:
+        logger.error(f"API with ID: {targets[operation['api']].id} was deleted from Kong Gateway but could not be deleted from the database")
+
+
+def commit_in_batches(operations, targets, outcomes, results):
+    """Persist successful Kong outcomes, committing ``BULK_COMMIT_BATCH_SIZE`` rows at a time.
+
+    A failed batch is retried item by item so that one bad row only fails
+    (and compensates) itself.
+    """
+    batch_size = app.config["BULK_COMMIT_BATCH_SIZE"]
+    succeeded = [index for index, outcome in outcomes.items() if "error" not in outcome]
+
+    for start in range(0, len(succeeded), batch_size):
+        batch = succeeded[start:start + batch_size]
+        try:
+            applied = {index: _apply(operations[index], targets, outcomes[index]) for index in batch}
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Bulk commit of {len(batch)} APIs failed, retrying one by one: {e}")
+            applied = {}
+            for index in batch:
+                try:
+                    applied_item = _apply(operations[index], targets, outcomes[index])
+                    db.session.commit()
+                    applied[index] = applied_item
+                except Exception as e:
+                    db.session.rollback()
+                    _compensate(operations[index], targets, outcomes[index])
+                    results[index] = _failure(500, "Internal server error.", str(e))
+
+        for index, (api_id, stale_names) in applied.items():
+            op = operations[index]["op"]
+            if op != "create":
+                invalidate_api(api_id, *stale_names)
+            results[index] = {
+                "status": 201 if op == "create" else 200,
+                "api_id": api_id
+            }
@@ -1,10 +1,22 @@
-from flask import request, jsonify, current_app as app
+import asyncio
+import logging
+
+from flask import request, jsonify, json, Response, stream_with_context, current_app as app
 from sqlalchemy import or_, and_
+from sqlalchemy.orm import contains_eager
 
 from app.extensions import db
-from app.models import API
+from app.models import API, Plugin, PluginAPIConfiguration, PluginConfig, eager_plugins
 from app.api import api
-from app.kong_client.api_client import (
+from app.pagination import keyset_page, next_cursor, parse_limit, parse_bool
+from app.json_filters import json_filters
+from app.cache import (
+    get_cached_api, cache_api, get_cached_api_plugins,
+    cache_api_plugins, invalidate_api
+)
+from app.serializers import columns, rows_to_dicts, json_response
+from app.etag import make_etag, table_validator, is_fresh, not_modified, tag
+from app.kong_client.async_api_client import (
     create_service_in_kong, create_route_in_kong, 
     update_service_in_kong, update_route_in_kong, 
     delete_service_in_kong, delete_route_in_kong
@@ -12,19 +24,86 @@ from app.kong_client.api_client import (
 from app.async_tasks import (
     rollback_for_api_creation_failure, 
     rollback_for_api_update_failure, 
+    rollback_for_route_update_failure,
     rollback_for_api_delete_failure
 )
+from app.jobs.respond_async import respond_async, fields_validator
+from app.idempotency import idempotent
+from app.api.bulk import (
+    validate_bulk_request, validate_operations, load_targets, check_uniqueness,
+    run_in_kong, commit_in_batches
+)
+
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+
+def _expand_plugins():
+    return "plugins" in request.args.get("expand", "").split(",")
+
+
+def _api_to_dict(api, expand_plugins=False):
+    api_data = api.to_dict()
+    if expand_plugins:
+        api_data["plugins"] = [plugin_config.to_dict() for plugin_config in api.plugins]
+    return api_data
 
 
 @api.route("/")
 def list_apis():
     try:
-        apis_list = API.query.all()
-        apis_data = [api.to_dict() for api in apis_list]
+        expand_plugins = _expand_plugins()
+        etag = make_etag(
+            "apis", request.query_string.decode(),
+            *table_validator(API, *([PluginAPIConfiguration] if expand_plugins else []))
+        )
+        
+        if is_fresh(etag):
+            return not_modified(etag, weak=True)
+        
+        limit = parse_limit(request.args.get("limit"))
+        statement = db.select(API) if expand_plugins else db.select(*columns(API))
+        
+        enabled = parse_bool(request.args.get("enabled"), "enabled")
+        if enabled is not None:
+            statement = statement.where(API.enabled == enabled)
+        
+        for field in ["name", "path"]:
+            prefix = request.args.get(field)
+            if prefix:
+                statement = statement.where(getattr(API, field).startswith(prefix, autoescape=True))
+        
+        methods = request.args.get("methods")
+        if methods:
+            statement = statement.where(API.methods.contains([method.strip().upper() for method in methods.split(",")]))
+        
+        statement = statement.where(*json_filters(API.headers, request.args, "headers", decode=False))
+        
+        if expand_plugins:
+            statement = statement.options(eager_plugins())
+        
+        result = db.session.execute(
+            keyset_page(statement, API, limit, request.args.get("cursor"))
+        )
+        
+        if expand_plugins:
+            apis_list = result.scalars().all()
+            apis_data = [_api_to_dict(api, expand_plugins) for api in apis_list[:limit]]
+        else:
+            apis_list = result.all()
+            apis_data = rows_to_dicts(apis_list[:limit])
 
+        return tag(json_response({
+            "APIs": apis_data,
+            "next_cursor": next_cursor(apis_list, limit)
+        }), etag, weak=True), 200
+    
+    except ValueError as e:
         return jsonify({
-            "APIs": apis_data
-        }), 200
+            "error": "Invalid data.",
+            "message": str(e)
+        }), 400
 
     except Exception as e:
         return jsonify({
@@ -33,27 +112,88 @@ def list_apis():
         }), 500
        
         
+@api.route("/export")
+def export_apis():
+    etag = make_etag("apis-export", *table_validator(API, PluginAPIConfiguration))
+    
+    if is_fresh(etag):
+        return not_modified(etag, weak=True)
+    
+    statement = (
+        db.select(API, PluginAPIConfiguration, Plugin)
+        .outerjoin(PluginAPIConfiguration, PluginAPIConfiguration.api_id == API.id)
+        .outerjoin(Plugin, Plugin.id == PluginAPIConfiguration.plugin_id)
+        .outerjoin(PluginConfig, PluginConfig.hash == PluginAPIConfiguration.config_hash)
+        .options(contains_eager(PluginAPIConfiguration.config_blob))
+        .order_by(API.created_at, API.id)
+        .execution_options(yield_per=app.config["EXPORT_YIELD_PER"])
+    )
+    
+    def generate():
+        try:
+            current_api, plugins_data = None, []
+            
+            for api_row, plugin_config, _ in db.session.execute(statement):
+                if current_api is not None and api_row.id != current_api.id:
+                    yield json.dumps({**current_api.to_dict(), "plugins": plugins_data}) + "\n"
+                    plugins_data = []
+                    
+                current_api = api_row
+                if plugin_config is not None:
+                    plugins_data.append(plugin_config.to_dict())
+                    
+            if current_api is not None:
+                yield json.dumps({**current_api.to_dict(), "plugins": plugins_data}) + "\n"
+                
+        except Exception as e:
+            logger.error(f"Export of APIs aborted: {e}")
+            raise
+        
+        finally:
+            db.session.close()
+    
+    return tag(Response(stream_with_context(generate()), mimetype="application/x-ndjson"), etag, weak=True)
+       
+        
 @api.route("/<api_identifier>")
 def get_api(api_identifier):
     try:
-        api = db.session.execute(
-            db.select(API).where(
-                or_(
-                    API.id == api_identifier,
-                    API.name == api_identifier
-                )   
-            )
-        ).scalar()
+        expand_plugins = _expand_plugins()
+        api_data = get_cached_api(api_identifier)
+        plugins_data = get_cached_api_plugins(api_data["id"]) if api_data and expand_plugins else None
+        
+        if api_data is None or (expand_plugins and plugins_data is None):
+            api = db.session.execute(
+                db.select(API)
+                .options(*([eager_plugins()] if expand_plugins else []))
+                .where(
+                    or_(
+                        API.id == api_identifier,
+                        API.name == api_identifier
+                    )   
+                )
+            ).scalar()
+            
+            if api is None:
+                return jsonify({
+                    "error": "Not found."
+                }), 404
+                
+            api_data = api.to_dict()
+            cache_api(api_data)
+            
+            if expand_plugins:
+                plugins_data = [plugin_config.to_dict() for plugin_config in api.plugins]
+                cache_api_plugins(api.id, plugins_data)
         
-        if api is None:
-            return jsonify({
-                "error": "Not found."
-            }), 404
+        etag = make_etag("api", api_data, plugins_data)
+        
+        if is_fresh(etag):
+            return not_modified(etag)
             
-        api_data = api.to_dict()
-        return jsonify({
-            "API": api_data
-        }), 200
+        return tag(jsonify({
+            "API": {**api_data, "plugins": plugins_data} if expand_plugins else api_data
+        }), etag), 200
     
     except Exception as e:
         return jsonify({
@@ -66,7 +206,9 @@ def get_api(api_identifier):
         
         
 @api.route("/", methods=["POST"])
-def create_api():
+@idempotent
+@respond_async(fields_validator("ALLOW_FIELDS_FOR_CREATE_API", "url", "path"))
+async def create_api():
     try:
         data = request.get_json()
         
@@ -119,7 +261,7 @@ def create_api():
             **({"name": data.get("name")} if data.get("name") else {})
         }
         
-        new_api.kong_service_id, service_error = create_service_in_kong(create_service_data)
+        new_api.kong_service_id, service_error = await create_service_in_kong(create_service_data)
         
         if service_error:
             return jsonify({
@@ -133,7 +275,7 @@ def create_api():
             **({"methods": data.get("methods")} if data.get("methods") else {})
         }
         
-        new_api.kong_route_id, route_error = create_route_in_kong(new_api.kong_service_id, create_route_data)
+        new_api.kong_route_id, route_error = await create_route_in_kong(new_api.kong_service_id, create_route_data)
         
         if route_error:
             rollback_for_api_creation_failure.delay(new_api.kong_service_id)
@@ -167,7 +309,9 @@ def create_api():
         
         
 @api.route("/<api_identifier>", methods=["PATCH"])
-def update_api(api_identifier):
+@idempotent
+@respond_async(fields_validator("ALLOW_FIELDS_FOR_UPDATE_API"))
+async def update_api(api_identifier):
     try:
         api_to_update = db.session.execute(
             db.select(API).where(
@@ -183,6 +327,8 @@ def update_api(api_identifier):
                 "error": "Not found.",
                 "message": "No API found with the provided identifier."
             }), 404
+        
+        api_id, original_name = api_to_update.id, api_to_update.name
     
         data = request.get_json()
         
@@ -223,49 +369,59 @@ def update_api(api_identifier):
             if data.get(field)
         }
         
-        if update_service_data:
-            original_service_data = {
-                "name": api_to_update.name,
-                "url": api_to_update.url,
-                "enabled": api_to_update.enabled
-            }
-            
-            service_status, service_error = update_service_in_kong(api_to_update.kong_service_id, update_service_data)
-            
-            if service_status == "failure":
-                return jsonify({
-                    "error": "Service update failed.",
-                    "message": service_error
-                }), 500
-                
-            for key, value in update_service_data.items():
-                setattr(api_to_update, key, value)
-
         update_route_data = {
             **({"paths": [data.get("path")]} if data.get("path") else {}),
             **({"headers": data.get("headers")} if data.get("headers") else {}),
             **({"methods": data.get("methods")} if data.get("methods") else {})
         }
         
+        original_service_data = {
+            "name": api_to_update.name,
+            "url": api_to_update.url,
+            "enabled": api_to_update.enabled
+        }
+        
+        original_route_data = {
+            "paths": [api_to_update.path],
+            "headers": api_to_update.headers,
+            "methods": api_to_update.methods
+        }
+        
+        # The service and the route are independent Kong entities, so both PATCHes are sent at once.
+        updates = {}
+        
+        if update_service_data:
+            updates["service"] = update_service_in_kong(api_to_update.kong_service_id, update_service_data)
+            
         if update_route_data:
-            route_status, route_error = update_route_in_kong(api_to_update.kong_route_id, update_route_data)
+            updates["route"] = update_route_in_kong(api_to_update.kong_route_id, update_route_data)
             
-            if route_status == "success":
-                for key, value in update_route_data.items():
-                    if key == "paths":
-                        api_to_update.path = data.get("path")
-                    else:
-                        setattr(api_to_update, key, value)
-            else:
-                if update_service_data:
-                    rollback_for_api_update_failure.delay(api_to_update.kong_service_id, original_service_data)
+        outcomes = dict(zip(updates, await asyncio.gather(*updates.values())))
+        failed = [entity for entity, (status, _) in outcomes.items() if status == "failure"]
+        
+        if failed:
+            if "service" in outcomes and "service" not in failed:
+                rollback_for_api_update_failure.delay(api_to_update.kong_service_id, original_service_data)
                 
-                return jsonify({
-                    "error": "Route update failed.",
-                    "message": route_error
-                }), 500
+            if "route" in outcomes and "route" not in failed:
+                rollback_for_route_update_failure.delay(api_to_update.kong_route_id, original_route_data)
+            
+            return jsonify({
+                "error": f"{failed[0].capitalize()} update failed.",
+                "message": outcomes[failed[0]][1]
+            }), 500
+            
+        for key, value in update_service_data.items():
+            setattr(api_to_update, key, value)
+            
+        for key, value in update_route_data.items():
+            if key == "paths":
+                api_to_update.path = data.get("path")
+            else:
+                setattr(api_to_update, key, value)
                     
         db.session.commit()
+        invalidate_api(api_id, original_name, data.get("name"))
         return jsonify({
             "message": "API updated successfully."
         }), 200
@@ -288,7 +444,9 @@ def update_api(api_identifier):
         
         
 @api.route("/<api_identifier>", methods=["DELETE"])
-def delete_api(api_identifier):
+@idempotent
+@respond_async()
+async def delete_api(api_identifier):
     try:
         api_to_delete = db.session.execute(
             db.select(API).where(
@@ -305,7 +463,8 @@ def delete_api(api_identifier):
                 "message": "No API found with the provided identifier."
             }), 404
             
-        route_status, route_error = delete_route_in_kong(api_to_delete.kong_route_id)
+        # Kong refuses to delete a service that still has routes, so these two calls stay sequential.
+        route_status, route_error = await delete_route_in_kong(api_to_delete.kong_route_id)
         
         if route_status == "failure":
             return jsonify({
@@ -313,7 +472,7 @@ def delete_api(api_identifier):
                 "message": route_error
             }), 500
             
-        service_status, service_error = delete_service_in_kong(api_to_delete.kong_service_id)
+        service_status, service_error = await delete_service_in_kong(api_to_delete.kong_service_id)
         
         if service_status == "failure":
             rollback_route_data = {
@@ -328,8 +487,10 @@ def delete_api(api_identifier):
                 "message": service_error
             }), 500
         
+        api_id, api_name = api_to_delete.id, api_to_delete.name
         db.session.delete(api_to_delete)
         db.session.commit()
+        invalidate_api(api_id, api_name)
         return jsonify({
             "message": "API deleted successfully."
         }), 200
@@ -341,5 +502,68 @@ def delete_api(api_identifier):
             "message": str(e)
         }), 500
         
+    finally:
+        db.session.close()
+        
+        
+@api.route("/bulk", methods=["POST"])
+@idempotent
+@respond_async(validate_bulk_request)
+async def bulk_apis():
+    try:
+        data = request.get_json()
+        
+        if data is None:
+            raise ValueError("Invalid JSON data.")
+        
+        error_response = validate_bulk_request(data)
+        
+        if error_response:
+            return error_response
+        
+        operations = data["operations"]
+        
+        results = validate_operations(operations)
+        targets = load_targets(operations, results)
+        check_uniqueness(operations, targets, results)
+        # Hand the connection back to the pool while the Kong calls are in flight;
+        # the detached targets keep their loaded columns and are merged back for the commits.
+        db.session.expunge_all()
+        db.session.rollback()
+        
+        outcomes = await run_in_kong(operations, targets, results)
+        results.update({index: outcome for index, outcome in outcomes.items() if "error" in outcome})
+        
+        commit_in_batches(operations, targets, outcomes, results)
+        
+        items = [
+            {
+                "index": index,
+                "op": operation.get("op") if isinstance(operation, dict) else None,
+                **results[index]
+            }
+            for index, operation in enumerate(operations)
+        ]
+        failed = sum(1 for item in items if item["status"] >= 400)
+        
+        return jsonify({
+            "succeeded": len(items) - failed,
+            "failed": failed,
+            "results": items
+        }), 207 if failed else 200
+        
+    except ValueError as e:
+        return jsonify({
+            "error": "Invalid data.",
+            "message": str(e)
+        }), 400
+    
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({
+            "error": "Internal server error.",
+            "message": str(e)
+        }), 500
+        
     finally:
         db.session.close()
\ No newline at end of file
@@ -1,107 +1,418 @@
 import logging
+import random
 import time
+import uuid
 
-from flask import current_app as app
 import requests
+from celery.exceptions import Retry
+from flask import current_app
+from werkzeug.test import EnvironBuilder
 
 from app import celery
-from app.extensions import Session
-from app.models import API
+from app.cache import invalidate_api
+from app.events import delete_orphan_plugins, delete_orphan_configs
+from app.extensions import db, Session
+from app.kong_client.client import get_kong_client
+from app.kong_client.breaker import CircuitOpenError
+from app.models import API, IdempotencyKey, Job, RollbackTask
+from app.metrics import ROLLBACK_TASKS, ROLLBACK_RETRIES
 
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
 logger = logging.getLogger(__name__)
 
 
-@celery.task
-def rollback_for_api_creation_failure(kong_service_id):
-    logger.info(f"Initiating rollback for service with ID: {kong_service_id}")
-    delete_service_url = f"{app.config['KONG_ADMIN_URL']}/services/{kong_service_id}"
-    max_retries = 5
-    attempt = 0
+class CoalescedTask(celery.Task):
+    """Rollback task coalesced per Kong entity.
+
+    Enqueuing writes a ``pending`` row keyed by ``coalesce_key`` (formatted
+    with the task arguments), publishes the message and then marks the row
+    ``queued``; if publishing fails the row is deleted again. When the task
+    starts it steps aside if a newer published row exists for the same key,
+    so only the latest compensating state for an entity reaches Kong,
+    whichever worker picks it up.
+    """
+
+    abstract = True
+    coalesce_key = None
 
-    while attempt < max_retries:
+    def apply_async(self, args=None, kwargs=None, task_id=None, **options):
+        # Retries re-publish with their original id and keep their row.
+        if task_id is not None:
+            return super().apply_async(args, kwargs, task_id=task_id, **options)
+        
+        task_id = str(uuid.uuid4())
+        recorded = False
         try:
-            logger.info(f"Attempt {attempt + 1}: Rolling back service with ID: {kong_service_id}")
-            delete_service_response = requests.delete(delete_service_url, timeout=300)
+            with Session.begin() as session:
+                session.add(RollbackTask(
+                    id=task_id,
+                    name=self.name,
+                    args=list(args or []),
+                    entity_key=self.coalesce_key.format(*(args or [])),
+                    status="pending",
+                    attempts=0
+                ))
+            recorded = True
+        except Exception as e:
+            logger.error(f"Failed to record pending rollback task {task_id}: {e}")
+        
+        try:
+            result = super().apply_async(args, kwargs, task_id=task_id, **options)
+        except Exception:
+            if recorded:
+                _forget(task_id)
+            raise
+        
+        if recorded:
+            _mark_queued(task_id)
+        return result
+
+
+def _forget(task_id):
+    """Delete the row of a rollback task whose message was never published."""
+    try:
+        with Session.begin() as session:
+            session.execute(db.delete(RollbackTask).where(RollbackTask.id == task_id))
+    except Exception as e:
+        logger.error(f"Failed to delete unpublished rollback task {task_id}: {e}")
+
+
+def _mark_queued(task_id):
+    try:
+        with Session.begin() as session:
+            # The worker may already have picked the task up.
+            session.execute(
+                db.update(RollbackTask)
+                .where(RollbackTask.id == task_id, RollbackTask.status == "pending")
+                .values(status="queued")
+            )
+    except Exception as e:
+        logger.error(f"Failed to mark rollback task {task_id} as queued: {e}")
+
+
+def _start(task):
+    """Mark ``task`` as running, or as superseded when a newer rollback for the same entity was queued."""
+    try:
+        with Session.begin() as session:
+            rollback_task = session.get(RollbackTask, task.request.id, with_for_update=True)
+            
+            if rollback_task is None:
+                rollback_task = RollbackTask(
+                    id=task.request.id,
+                    name=task.name,
+                    args=list(task.request.args or []),
+                    entity_key=task.coalesce_key.format(*(task.request.args or []))
+                )
+                session.add(rollback_task)
+                session.flush()
                 
-            if delete_service_response.status_code == 204:
-                logger.info(f"Service with ID: {kong_service_id} successfully deleted from Kong Gateway")
-                return
-            elif delete_service_response.status_code >= 400:
-                logger.error(f"Failed to delete service in Kong Gateway. Status code: {delete_service_response.status_code}, Response: {delete_service_response.text}")
-                return
-
-        except requests.RequestException as e:
-            logger.error(f"Request failed on attempt {attempt + 1}: {e}")
+            superseded = session.execute(
+                db.select(RollbackTask.id)
+                .where(
+                    RollbackTask.entity_key == rollback_task.entity_key,
+                    RollbackTask.sequence > rollback_task.sequence,
+                    # A pending row may never be published, so only published or started ones count.
+                    RollbackTask.status != "pending"
+                )
+                .limit(1)
+            ).first() is not None
+            
+            rollback_task.status = "superseded" if superseded else "running"
+            rollback_task.attempts = task.request.retries + (0 if superseded else 1)
+            entity_key = rollback_task.entity_key
+            
+    except Exception as e:
+        # Running a redundant compensation is safer than skipping the only one.
+        logger.error(f"Failed to check rollback task {task.request.id} for newer rollbacks: {e}")
+        return True
         
-        except Exception as e:
-            logger.error(f"An unexpected error occurred on attempt {attempt + 1}: {e}")
+    if superseded:
+        ROLLBACK_TASKS.labels(task.name, "superseded").inc()
+        logger.info(f"Rollback task {task.request.id} for {entity_key} was superseded by a newer one")
+    return not superseded
+
+
+def _record(task, status, error=None):
+    """Persist the retry state of a rollback task so operators can query it."""
+    if status in ("succeeded", "failed"):
+        ROLLBACK_TASKS.labels(task.name, status).inc()
+        
+    try:
+        with Session.begin() as session:
+            rollback_task = session.get(RollbackTask, task.request.id)
+            
+            if rollback_task is None:
+                rollback_task = RollbackTask(id=task.request.id, name=task.name, args=list(task.request.args or []))
+                session.add(rollback_task)
+                
+            rollback_task.status = status
+            rollback_task.attempts = task.request.retries + 1
+            rollback_task.last_error = error
+    except Exception as e:
+        logger.error(f"Failed to record state of rollback task {task.request.id}: {e}")
+
+
+def _retry_later(task, error):
+    """Reschedule ``task`` with exponential backoff and jitter, or record it as failed once retries run out."""
+    attempt = task.request.retries + 1
+    max_retries = celery.conf["ROLLBACK_MAX_RETRIES"]
+    
+    if task.request.retries >= max_retries:
+        logger.error(f"Rollback task {task.name} gave up after {attempt} attempts: {error}")
+        _record(task, "failed", error)
+        return
+    
+    countdown = min(celery.conf["ROLLBACK_RETRY_BACKOFF_MAX"], 2 ** attempt) + random.uniform(0, celery.conf["ROLLBACK_RETRY_JITTER"])
+    logger.info(f"Rollback task {task.name} attempt {attempt} failed, retrying in {countdown:.1f}s")
+    ROLLBACK_RETRIES.labels(task.name).inc()
+    _record(task, "retrying", error)
+    raise task.retry(countdown=countdown, max_retries=max_retries)
+
+
+def _request(method, path, **kwargs):
+    kong = get_kong_client()
+    return kong.request(method, path, timeout=(kong.timeout[0], celery.conf["ROLLBACK_READ_TIMEOUT"]), **kwargs)
+
+
+def _failed_response(response):
+    return f"Status code: {response.status_code}, Response: {response.text}"
+
+
+# acks_late keeps the message on the broker until the attempt finishes, so a
+# worker crash mid-rollback redelivers it instead of losing the compensation.
+ROLLBACK_TASK_OPTIONS = {"base": CoalescedTask, "bind": True, "acks_late": True, "reject_on_worker_lost": True}
+
+
+@celery.task(**ROLLBACK_TASK_OPTIONS, coalesce_key="service:{0}")
+def rollback_for_api_creation_failure(self, kong_service_id, kong_route_id=None):
+    logger.info(f"Attempt {self.request.retries + 1}: Rolling back service with ID: {kong_service_id}")
+    if not _start(self):
+        return
+    
+    try:
+        if kong_route_id:
+            delete_route_response = _request("DELETE", f"/routes/{kong_route_id}")
+            
+            if delete_route_response.status_code not in (204, 404):
+                logger.error(f"Failed to delete route in Kong Gateway. {_failed_response(delete_route_response)}")
+                if delete_route_response.status_code < 500:
+                    _record(self, "failed", _failed_response(delete_route_response))
+                    return
+                return _retry_later(self, _failed_response(delete_route_response))
+            
+        delete_service_response = _request("DELETE", f"/services/{kong_service_id}")
+            
+        if delete_service_response.status_code in (204, 404):
+            logger.info(f"Service with ID: {kong_service_id} successfully deleted from Kong Gateway")
+            _record(self, "succeeded")
+            return
         
-        attempt += 1
-        time.sleep(2 ** attempt)
+        logger.error(f"Failed to delete service in Kong Gateway. {_failed_response(delete_service_response)}")
+        if delete_service_response.status_code < 500:
+            _record(self, "failed", _failed_response(delete_service_response))
+            return
+        error = _failed_response(delete_service_response)
 
-    logger.error(f"Failed to delete service in Kong Gateway after {max_retries} attempts")
+    except (requests.RequestException, CircuitOpenError) as e:
+        logger.error(f"Request failed on attempt {self.request.retries + 1}: {e}")
+        error = str(e)
+    
+    except Retry:
+        # Raised by _retry_later after a failed route delete.
+        raise
+    
+    except Exception as e:
+        # Record the outcome rather than leave the row running forever.
+        logger.error(f"Rollback task {self.name} failed unexpectedly: {e}")
+        _record(self, "failed", str(e))
+        raise
+    
+    _retry_later(self, error)
     
 
-@celery.task
-def rollback_for_api_update_failure(kong_service_id, data):
-    logger.info(f"Initiating rollback for service with ID: {kong_service_id}")
-    rollback_service_url = f"{app.config['KONG_ADMIN_URL']}/services/{kong_service_id}"
-    max_retries = 5
-    attempt = 0
+@celery.task(**ROLLBACK_TASK_OPTIONS, coalesce_key="service:{0}")
+def rollback_for_api_update_failure(self, kong_service_id, data):
+    logger.info(f"Attempt {self.request.retries + 1}: Rolling back service with ID: {kong_service_id}")
+    if not _start(self):
+        return
                 
-    while attempt < max_retries:
-        try:
-            rollback_service_response = requests.patch(rollback_service_url, json=data, timeout=300)
-                    
-            if rollback_service_response.status_code == 200:
-                logger.info(f"Rolled back service with ID: {kong_service_id} due to route update failure")
-                return
-            elif rollback_service_response.status_code >= 400:
-                logger.error(f"Failed to rollback service in Kong Gateway. Status code: {rollback_service_response.status_code}, Response: {rollback_service_response.text}")
-                return
+    try:
+        rollback_service_response = _request("PATCH", f"/services/{kong_service_id}", json=data)
+                
+        if rollback_service_response.status_code == 200:
+            logger.info(f"Rolled back service with ID: {kong_service_id} due to route update failure")
+            _record(self, "succeeded")
+            return
         
-        except requests.RequestException as e:
-            logger.error(f"Request failed on attempt {attempt + 1}: {e}")
+        logger.error(f"Failed to rollback service in Kong Gateway. {_failed_response(rollback_service_response)}")
+        if rollback_service_response.status_code < 500:
+            _record(self, "failed", _failed_response(rollback_service_response))
+            return
+        error = _failed_response(rollback_service_response)
+    
+    except (requests.RequestException, CircuitOpenError) as e:
+        logger.error(f"Request failed on attempt {self.request.retries + 1}: {e}")
+        error = str(e)
+    
+    except Exception as e:
+        # Record the outcome rather than leave the row running forever.
+        logger.error(f"Rollback task {self.name} failed unexpectedly: {e}")
+        _record(self, "failed", str(e))
+        raise
+                     
+    _retry_later(self, error)
+    
+
+@celery.task(**ROLLBACK_TASK_OPTIONS, coalesce_key="route:{0}")
+def rollback_for_route_update_failure(self, kong_route_id, data):
+    logger.info(f"Attempt {self.request.retries + 1}: Rolling back route with ID: {kong_route_id}")
+    if not _start(self):
+        return
+                
+    try:
+        rollback_route_response = _request("PATCH", f"/routes/{kong_route_id}", json=data)
+                
+        if rollback_route_response.status_code == 200:
+            logger.info(f"Rolled back route with ID: {kong_route_id} due to service update failure")
+            _record(self, "succeeded")
+            return
         
-        except Exception as e:
-            logger.error(f"An unexpected error occurred on attempt {attempt + 1}: {e}")
-                    
-        attempt += 1
-        time.sleep(2 ** attempt) 
+        logger.error(f"Failed to rollback route in Kong Gateway. {_failed_response(rollback_route_response)}")
+        if rollback_route_response.status_code < 500:
+            _record(self, "failed", _failed_response(rollback_route_response))
+            return
+        error = _failed_response(rollback_route_response)
+    
+    except (requests.RequestException, CircuitOpenError) as e:
+        logger.error(f"Request failed on attempt {self.request.retries + 1}: {e}")
+        error = str(e)
+    
+    except Exception as e:
+        # Record the outcome rather than leave the row running forever.
+        logger.error(f"Rollback task {self.name} failed unexpectedly: {e}")
+        _record(self, "failed", str(e))
+        raise
                      
-    logger.error(f"Failed to rollback service in Kong Gateway after {max_retries} retries")
+    _retry_later(self, error)
+    
+
+@celery.task(**ROLLBACK_TASK_OPTIONS, coalesce_key="service-route:{0}")
+def rollback_for_api_delete_failure(self, kong_service_id, api_id, data):
+    logger.info(f"Attempt {self.request.retries + 1}: Rolling back route for API with ID: {api_id}")
+    if not _start(self):
+        return
+
+    try:
+        rollback_route_response = _request("POST", f"/services/{kong_service_id}/routes", json=data)
+
+        if rollback_route_response.status_code == 201:
+            with Session.begin() as session:
+                api_to_rollback = session.get(API, api_id)
+                api_to_rollback.kong_route_id = rollback_route_response.json().get("id")
+                api_name = api_to_rollback.name
+                logger.info(f"Rolled back route with ID: {api_to_rollback.kong_route_id} after service delete failure")
+            invalidate_api(api_id, api_name)
+            _record(self, "succeeded")
+            return
+        
+        logger.error(f"Failed to rollback route in Kong Gateway. {_failed_response(rollback_route_response)}")
+        if rollback_route_response.status_code < 500:
+            _record(self, "failed", _failed_response(rollback_route_response))
+            return
+        error = _failed_response(rollback_route_response)
+
+    except (requests.RequestException, CircuitOpenError) as e:
+        logger.error(f"Request failed on attempt {self.request.retries + 1}: {e}")
+        error = str(e)
     
+    except Exception as e:
+        # Record the outcome rather than leave the row running forever.
+        logger.error(f"Rollback task {self.name} failed unexpectedly: {e}")
+        _record(self, "failed", str(e))
+        raise
+
+    _retry_later(self, error)
+
 
 @celery.task
-def rollback_for_api_delete_failure(kong_service_id, api_id, data):
-    logger.info(f"Initiating rollback route for API with ID: {api_id}")
-    rollback_route_url = f"{app.config['KONG_ADMIN_URL']}/services/{kong_service_id}/routes"
-    max_retries = 5
-    attempt = 0
+def sweep_orphan_plugins():
+    with Session.begin() as session:
+        deleted = delete_orphan_plugins(session.connection())
+        deleted_configs = delete_orphan_configs(session.connection())
+        
+    if deleted:
+        logger.info(f"Deleted {deleted} orphan plugins")
+    if deleted_configs:
+        logger.info(f"Deleted {deleted_configs} unreferenced plugin configs")
 
-    while attempt < max_retries:
-        try:
-            rollback_route_response = requests.post(rollback_route_url, json=data, timeout=300)
 
-            if rollback_route_response.status_code == 201:
-                with Session.begin() as session:
-                    api_to_rollback = session.get(API, api_id)
-                    api_to_rollback.kong_route_id = rollback_route_response.json().get("id")
-                    logger.info(f"Rolled back route with ID: {api_to_rollback.kong_route_id} after service delete failure")
-                return
-            elif rollback_route_response.status_code >= 400:
-                logger.error(f"Failed to rollback route in Kong Gateway. Status code: {rollback_route_response.status_code}, Response: {rollback_route_response.text}")
-                return
+@celery.task
+def evict_idempotency_keys():
+    with Session.begin() as session:
+        evicted = session.execute(
+            db.delete(IdempotencyKey).where(IdempotencyKey.expires_at < int(time.time()))
+        ).rowcount
+        
+    if evicted:
+        logger.info(f"Evicted {evicted} expired idempotency keys")
 
-        except requests.RequestException as e:
-            logger.error(f"Request failed on attempt {attempt + 1}: {e}")
 
-        except Exception as e:
-            logger.error(f"An unexpected error occurred on attempt {attempt + 1}: {e}")
+@celery.task
+def run_job(job_id):
+    """Dispatch a request accepted with ``Prefer: respond-async`` and store its response on the job."""
+    with Session.begin() as session:
+        job = session.get(Job, job_id)
+        
+        if job is None or job.status != "queued":
+            return
+        
+        job.status = "running"
+        method, path, payload, headers = job.method, job.path, job.payload, job.headers
+        
+    logger.info(f"Running job {job_id}: {method} {path}")
+    
+    environ = EnvironBuilder(
+        path=path,
+        method=method,
+        headers=headers,
+        **({"json": payload} if payload is not None else {})
+    ).get_environ()
+    
+    try:
+        # The same request context and dispatch the WSGI app would run, hooks included.
+        with current_app.request_context(environ):
+            response = current_app.full_dispatch_request()
+            status_code, result = response.status_code, response.get_json(silent=True)
+    except Exception as e:
+        logger.error(f"Job {job_id} failed: {e}")
+        status_code, result = 500, {"error": "Internal server error.", "message": str(e)}
+    
+    with Session.begin() as session:
+        job = session.get(Job, job_id)
+        job.status = "succeeded" if status_code < 400 else "failed"
+        job.status_code = status_code
+        job.result = result
 
-        attempt += 1
-        time.sleep(2 ** attempt)
 
-    logger.error(f"Failed to rollback route in Kong Gateway after {max_retries} retries")
\ No newline at end of file
+@celery.task
+def fail_stale_jobs():
+    """Fail jobs left queued or running by a lost message or a worker that died mid-request."""
+    stale_before = int(time.time()) - celery.conf["JOB_STALE_AFTER"]
+    
+    with Session.begin() as session:
+        failed = session.execute(
+            db.update(Job)
+            .where(Job.status.in_(("queued", "running")), Job.updated_at < stale_before)
+            .values(
+                status="failed",
+                status_code=500,
+                result={
+                    "error": "Job abandoned.",
+                    "message": "The job did not finish in time; its changes may be partially applied."
+                }
+            )
+        ).rowcount
+        
+    if failed:
+        logger.warning(f"Marked {failed} stale jobs as failed")
\ No newline at end of file
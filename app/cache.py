@@ -0,0 +1,198 @@
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app
+
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+
+class NullCache:
+    def get(self, key):
+        return None
+
+    def set(self, key, value):
+        pass
+
+    def delete_many(self, keys):
+        pass
+
+
+class LRUCache:
+    """In-process LRU cache whose entries expire ``ttl`` seconds after being set.
+
+    Invalidations only reach the process that made them, so with several
+    workers a stale entry can survive for up to ``ttl`` seconds; use a
+    shared backend when that matters.
+    """
+
+    def __init__(self, max_entries=10000, ttl=30):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete_many(self, keys):
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+
+class RedisCache:
+    def __init__(self, url, ttl=30, prefix=""):
+        import redis
+
+        self.client = redis.Redis.from_url(url)
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def get(self, key):
+        try:
+            value = self.client.get(self.prefix + key)
+        except Exception as e:
+            logger.error(f"Cache read failed: {e}")
+            return None
+        return json.loads(value) if value is not None else None
+
+    def set(self, key, value):
+        try:
+            self.client.setex(self.prefix + key, self.ttl, json.dumps(value))
+        except Exception as e:
+            logger.error(f"Cache write failed: {e}")
+
+    def delete_many(self, keys):
+        if not keys:
+            return
+        try:
+            self.client.delete(*(self.prefix + key for key in keys))
+        except Exception as e:
+            # Entries still expire after the TTL; the write already committed.
+            logger.error(f"Cache invalidation failed: {e}")
+
+
+class MemcachedCache:
+    def __init__(self, url, ttl=30, prefix=""):
+        from pymemcache.client.base import Client
+
+        self.client = Client(url.split("://", 1)[-1])
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def _key(self, key):
+        # Memcached keys cannot contain spaces or exceed 250 bytes, and API names may do both.
+        return self.prefix + hashlib.sha1(key.encode()).hexdigest()
+
+    def get(self, key):
+        try:
+            value = self.client.get(self._key(key))
+        except Exception as e:
+            logger.error(f"Cache read failed: {e}")
+            return None
+        return json.loads(value) if value is not None else None
+
+    def set(self, key, value):
+        try:
+            self.client.set(self._key(key), json.dumps(value), expire=self.ttl)
+        except Exception as e:
+            logger.error(f"Cache write failed: {e}")
+
+    def delete_many(self, keys):
+        if not keys:
+            return
+        try:
+            self.client.delete_many([self._key(key) for key in keys])
+        except Exception as e:
+            # Entries still expire after the TTL; the write already committed.
+            logger.error(f"Cache invalidation failed: {e}")
+
+
+def create_cache(config):
+    backend = config["CACHE_BACKEND"]
+
+    if backend == "lru":
+        return LRUCache(max_entries=config["CACHE_MAX_ENTRIES"], ttl=config["CACHE_TTL"])
+    if backend == "redis":
+        return RedisCache(config["CACHE_URL"], ttl=config["CACHE_TTL"], prefix=config["CACHE_KEY_PREFIX"])
+    if backend == "memcached":
+        return MemcachedCache(config["CACHE_URL"], ttl=config["CACHE_TTL"], prefix=config["CACHE_KEY_PREFIX"])
+    if backend == "null":
+        return NullCache()
+
+    raise ValueError(f"Unknown CACHE_BACKEND: {backend}")
+
+
+def get_cache():
+    return current_app.extensions["cache"]
+
+
+def api_key(api_id):
+    return f"api:{api_id}"
+
+
+def api_name_key(name):
+    return f"api-name:{name}"
+
+
+def api_plugins_key(api_id):
+    return f"api-plugins:{api_id}"
+
+
+def cached_api_id(api_identifier):
+    """Map an id-or-name identifier to a cached API id, if the name mapping is cached."""
+    return get_cache().get(api_name_key(api_identifier)) or api_identifier
+
+
+def get_cached_api(api_identifier):
+    cache = get_cache()
+    return cache.get(api_key(api_identifier)) or cache.get(api_key(cached_api_id(api_identifier)))
+
+
+def cache_api(api_data):
+    cache = get_cache()
+    cache.set(api_key(api_data["id"]), api_data)
+    if api_data.get("name"):
+        cache.set(api_name_key(api_data["name"]), api_data["id"])
+
+
+def get_cached_api_plugins(api_id):
+    return get_cache().get(api_plugins_key(api_id))
+
+
+def cache_api_plugins(api_id, plugins_data):
+    get_cache().set(api_plugins_key(api_id), plugins_data)
+
+
+def invalidate_api(api_id, *names):
+    get_cache().delete_many([
+        api_key(api_id),
+        api_plugins_key(api_id),
+        *(api_name_key(name) for name in names if name)
+    ])
+
+
+def invalidate_api_plugins(api_id):
+    get_cache().delete_many([api_plugins_key(api_id)])
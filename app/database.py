@@ -0,0 +1,44 @@
+import time
+
+from sqlalchemy.pool import QueuePool
+
+from app.metrics import DB_POOL_CHECKOUT_WAIT
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool exporting how long each checkout waited for a free connection."""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            DB_POOL_CHECKOUT_WAIT.observe(time.perf_counter() - started)
+
+
+def engine_options(config):
+    """Build ``SQLALCHEMY_ENGINE_OPTIONS`` from the ``DB_*`` settings.
+
+    Flask-SQLAlchemy creates the one engine per process from these options
+    and Celery tasks reuse it through ``Session``. With ``DB_PGBOUNCER`` the
+    ``options`` startup parameter, which PgBouncer rejects, is not sent
+    (set ``statement_timeout`` on the database role instead) and psycopg 3
+    is told not to prepare statements server-side; psycopg2 never does.
+    """
+    connect_args = {}
+
+    if config["DB_PGBOUNCER"]:
+        if config["SQLALCHEMY_DATABASE_URI"].startswith("postgresql+psycopg:"):
+            connect_args["prepare_threshold"] = None
+    elif config["DB_STATEMENT_TIMEOUT_MS"]:
+        connect_args["options"] = f"-c statement_timeout={config['DB_STATEMENT_TIMEOUT_MS']}"
+
+    return {
+        "poolclass": TimedQueuePool,
+        "pool_size": config["DB_POOL_SIZE"],
+        "max_overflow": config["DB_MAX_OVERFLOW"],
+        "pool_timeout": config["DB_POOL_TIMEOUT"],
+        "pool_recycle": config["DB_POOL_RECYCLE"],
+        "pool_pre_ping": config["DB_POOL_PRE_PING"],
+        "connect_args": connect_args
+    }
\ No newline at end of file
@@ -0,0 +1,43 @@
+import hashlib
+import json
+
+from flask import request, make_response
+from sqlalchemy import func
+
+from app.extensions import db
+
+
+def make_etag(*parts):
+    return hashlib.sha1(json.dumps(parts, default=str, sort_keys=True).encode()).hexdigest()
+
+
+def table_validator(*models):
+    """Return ``max(updated_at)`` and ``count(*)`` of every model's table in one round trip.
+
+    ``updated_at`` has one-second resolution, so two writes within the same
+    second, or an update and a delete that leave the count unchanged, can
+    produce the same values. Tags built from this validator must therefore
+    be sent as weak (``tag(..., weak=True)``); single resources are tagged
+    with a hash of their serialized payload instead.
+    """
+    columns = []
+    for model in models:
+        columns.append(db.select(func.max(model.updated_at)).scalar_subquery())
+        columns.append(db.select(func.count()).select_from(model).scalar_subquery())
+    return tuple(db.session.execute(db.select(*columns)).one())
+
+
+def is_fresh(etag):
+    # If-None-Match uses the weak comparison, so W/ tags from clients match too.
+    return request.if_none_match.contains_weak(etag)
+
+
+def not_modified(etag, weak=False):
+    response = make_response("", 304)
+    response.set_etag(etag, weak=weak)
+    return response
+
+
+def tag(response, etag, weak=False):
+    response.set_etag(etag, weak=weak)
+    return response
\ No newline at end of file
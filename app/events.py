@@ -1,22 +1,54 @@
 import logging
-from sqlalchemy import event
+from sqlalchemy import event, delete, exists, select
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import SQLAlchemyError
-from app.models import Plugin
+from app.models import Plugin, PluginAPIConfiguration, PluginConfig
 
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
 logger = logging.getLogger(__name__)
 
 
+def delete_orphan_plugins(connection, plugin_ids=None):
+    """Delete plugins no API uses any more, restricted to ``plugin_ids`` when given."""
+    statement = delete(Plugin).where(
+        ~exists().where(PluginAPIConfiguration.plugin_id == Plugin.id)
+    )
+    
+    if plugin_ids is not None:
+        statement = statement.where(Plugin.id.in_(plugin_ids))
+        
+    return connection.execute(statement).rowcount
+
+
+def delete_orphan_configs(connection):
+    """Delete stored plugin configs no attachment references any more.
+
+    Configs locked by a writer that is about to reference them are skipped.
+    """
+    orphans = (
+        select(PluginConfig.hash)
+        .where(~exists().where(PluginAPIConfiguration.config_hash == PluginConfig.hash))
+        .with_for_update(skip_locked=True)
+    )
+    return connection.execute(
+        delete(PluginConfig).where(PluginConfig.hash.in_(orphans))
+    ).rowcount
+
+
 def delete_plugin_if_empty(session: Session, flush_context):
-    for plugin in session.query(Plugin).all():
-        if not plugin.apis:
-            try:
-                session.delete(plugin)
-            except SQLAlchemyError as e:
-                logger.error(f"Error deleting the {plugin.name} plugin: {e}")
-                pass
+    plugin_ids = {
+        instance.plugin_id for instance in session.deleted
+        if isinstance(instance, PluginAPIConfiguration)
+    }
+    
+    if not plugin_ids:
+        return
+    
+    try:
+        delete_orphan_plugins(session.connection(), plugin_ids)
+    except SQLAlchemyError as e:
+        logger.error(f"Error deleting orphan plugins {sorted(plugin_ids)}: {e}")
 
 
 event.listen(Session, "after_flush", delete_plugin_if_empty)
\ No newline at end of file
@@ -0,0 +1,171 @@
+import asyncio
+import functools
+import hashlib
+import logging
+import time
+
+from flask import request, jsonify, Response, current_app as app
+from sqlalchemy.dialects.postgresql import insert
+
+from app.extensions import db
+from app.models import IdempotencyKey
+
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+REPLAYED_HEADERS = ("Location", "Preference-Applied")
+
+
+def _request_hash():
+    return hashlib.sha1(b"\n".join([
+        request.method.encode(),
+        request.path.encode(),
+        request.get_data()
+    ])).hexdigest()
+
+
+def _claim(key, request_hash):
+    """Insert an in-flight row for ``key``; return whether we own it, and the existing row if we do not."""
+    now = int(time.time())
+    inserted = db.session.execute(
+        insert(IdempotencyKey)
+        .values(
+            key=key,
+            request_hash=request_hash,
+            status="in_flight",
+            expires_at=now + app.config["IDEMPOTENCY_LOCK_TIMEOUT"],
+            created_at=now,
+            updated_at=now
+        )
+        .on_conflict_do_nothing(index_elements=[IdempotencyKey.key])
+        .returning(IdempotencyKey.key)
+    ).first()
+    db.session.commit()
+
+    if inserted:
+        return True, None
+
+    existing = db.session.get(IdempotencyKey, key, populate_existing=True)
+
+    if existing is not None and existing.expires_at < now:
+        # Either past its TTL or the request holding it died; start over.
+        db.session.delete(existing)
+        db.session.commit()
+        return _claim(key, request_hash)
+
+    return False, existing
+
+
+def _store(key, response):
+    idempotency_key = db.session.get(IdempotencyKey, key)
+
+    # Server errors are stored too: a 500 may follow a Kong write, a scheduled
+    # rollback or a committed row, so running the request again is not safe.
+    idempotency_key.status = "completed"
+    idempotency_key.status_code = response.status_code
+    idempotency_key.mimetype = response.mimetype
+    idempotency_key.headers = {name: response.headers[name] for name in REPLAYED_HEADERS if name in response.headers}
+    idempotency_key.body = response.get_data(as_text=True)
+    idempotency_key.expires_at = int(time.time()) + app.config["IDEMPOTENCY_TTL"]
+
+    db.session.commit()
+
+
+def _release(key):
+    try:
+        db.session.execute(db.delete(IdempotencyKey).where(IdempotencyKey.key == key))
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Failed to release Idempotency-Key {key}, it expires after IDEMPOTENCY_LOCK_TIMEOUT: {e}")
+
+
+def _replay(idempotency_key):
+    response = Response(idempotency_key.body, status=idempotency_key.status_code, mimetype=idempotency_key.mimetype)
+    response.headers.update(idempotency_key.headers or {})
+    response.headers["Idempotent-Replayed"] = "true"
+    return response
+
+
+def idempotent(view):
+    """Honour an ``Idempotency-Key`` header on a write view.
+
+    The first request with a key runs the view and stores its response for
+    ``IDEMPOTENCY_TTL`` seconds; repeats get that response back without
+    touching Kong. A repeat arriving while the first one is still running
+    polls the row until it completes instead of starting a second write.
+    """
+    @functools.wraps(view)
+    async def wrapper(*args, **kwargs):
+        key = request.headers.get("Idempotency-Key")
+
+        if not key:
+            return await view(*args, **kwargs)
+
+        try:
+            if len(key) > 255:
+                raise ValueError("The Idempotency-Key header must be at most 255 characters.")
+
+            request_hash = _request_hash()
+            deadline = time.monotonic() + app.config["IDEMPOTENCY_WAIT_TIMEOUT"]
+
+            while True:
+                claimed, existing = _claim(key, request_hash)
+
+                if claimed:
+                    break
+
+                if existing is None:
+                    # Released by a failed request between our insert and read.
+                    continue
+
+                if existing.request_hash != request_hash:
+                    return jsonify({
+                        "error": "Idempotency key reused.",
+                        "message": "The Idempotency-Key was already used for a different request."
+                    }), 422
+
+                if existing.status == "completed":
+                    return _replay(existing)
+
+                if time.monotonic() >= deadline:
+                    return jsonify({
+                        "error": "Conflict.",
+                        "message": "A request with this Idempotency-Key is still in progress."
+                    }), 409
+
+                db.session.close()
+                await asyncio.sleep(app.config["IDEMPOTENCY_POLL_INTERVAL"])
+
+        except ValueError as e:
+            return jsonify({
+                "error": "Invalid data.",
+                "message": str(e)
+            }), 400
+
+        except Exception as e:
+            db.session.rollback()
+            return jsonify({
+                "error": "Internal server error.",
+                "message": str(e)
+            }), 500
+
+        try:
+            response = app.make_response(await view(*args, **kwargs))
+        except Exception:
+            _release(key)
+            raise
+
+        try:
+            _store(key, response)
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Failed to store response for Idempotency-Key {key}: {e}")
+            _release(key)
+        finally:
+            db.session.close()
+
+        return response
+
+    return wrapper
\ No newline at end of file
@@ -0,0 +1,5 @@
+from flask import Blueprint
+
+jobs = Blueprint("jobs", __name__)
+
+from app.jobs import routes
\ No newline at end of file
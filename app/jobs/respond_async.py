@@ -0,0 +1,119 @@
+import functools
+import uuid
+
+from flask import request, jsonify, url_for, current_app as app
+
+from app.extensions import db
+from app.models import Job
+from app.async_tasks import run_job
+
+
+# Dropped when the request is stored for replay: the replay must run the
+# view synchronously and must not hit the idempotency key it was accepted under.
+UNREPLAYED_HEADERS = {"prefer", "idempotency-key", "content-length"}
+
+
+def prefers_async():
+    prefer = request.headers.get("Prefer", "")
+    return any(token.strip().lower() == "respond-async" for token in prefer.split(","))
+
+
+def fields_validator(allowed_fields_key, *required_fields):
+    """Build a validator running the same field checks as the write view, minus the database."""
+    def validate(data):
+        if not isinstance(data, dict):
+            raise ValueError("Invalid JSON data.")
+        
+        missing_fields = [field for field in required_fields if not data.get(field)]
+        
+        if missing_fields:
+            return jsonify({
+                "error": "Missing required fields.",
+                "message": f"The following required fields are missing: {', '.join(missing_fields)}."
+            }), 400
+        
+        unknown_fields = {
+            field: "unknown field" for field in data.keys()
+            if field not in app.config[allowed_fields_key]
+        }
+        
+        if unknown_fields:
+            return jsonify({
+                "error": "schema violation",
+                "fields": unknown_fields
+            }), 400
+        
+    return validate
+
+
+def respond_async(validate=None):
+    """Let a write view honour ``Prefer: respond-async``.
+
+    The request body is validated in the request thread, then a job row is
+    persisted and ``202 Accepted`` returned with the job URL. A Celery worker
+    dispatches the same request, headers included, and records its response
+    on the job. Without
+    the header the view runs as usual.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        async def wrapper(*args, **kwargs):
+            if not prefers_async():
+                return await view(*args, **kwargs)
+            
+            try:
+                # DELETE bodies are optional, so their payload may be None.
+                payload = request.get_json(silent=True) if request.method == "DELETE" else request.get_json()
+                
+                if request.method != "DELETE" and payload is None:
+                    raise ValueError("Invalid JSON data.")
+                
+                if validate:
+                    error_response = validate(payload)
+                    if error_response:
+                        return error_response
+                
+                job = Job(
+                    id=str(uuid.uuid4()),
+                    method=request.method,
+                    path=request.full_path.rstrip("?"),
+                    payload=payload,
+                    headers={
+                        name: value for name, value in request.headers.items()
+                        if name.lower() not in UNREPLAYED_HEADERS
+                    },
+                    status="queued"
+                )
+                job_id = job.id
+                db.session.add(job)
+                db.session.commit()
+                
+                run_job.delay(job_id)
+                
+                response = jsonify({
+                    "message": "Request accepted.",
+                    "job_id": job_id,
+                    "status": "queued"
+                })
+                response.headers["Location"] = url_for("jobs.get_job", job_id=job_id)
+                response.headers["Preference-Applied"] = "respond-async"
+                return response, 202
+            
+            except ValueError as e:
+                return jsonify({
+                    "error": "Invalid data.",
+                    "message": str(e)
+                }), 400
+            
+            except Exception as e:
+                db.session.rollback()
+                return jsonify({
+                    "error": "Internal server error.",
+                    "message": str(e)
+                }), 500
+            
+            finally:
+                db.session.close()
+            
+        return wrapper
+    return decorator
\ No newline at end of file
@@ -0,0 +1,29 @@
+from flask import jsonify
+
+from app.extensions import db
+from app.jobs import jobs
+from app.models import Job
+from app.serializers import json_response
+
+
+@jobs.route("/jobs/<job_id>")
+def get_job(job_id):
+    try:
+        job = db.session.get(Job, job_id)
+        
+        if job is None:
+            return jsonify({
+                "error": "Not found.",
+                "message": "No job found with the provided ID."
+            }), 404
+        
+        return json_response(job.to_dict()), 200
+    
+    except Exception as e:
+        return jsonify({
+            "error": "Internal server error.",
+            "message": str(e)
+        }), 500
+        
+    finally:
+        db.session.close()
\ No newline at end of file
@@ -0,0 +1,111 @@
+import json
+import math
+
+from sqlalchemy import cast, not_, or_
+from sqlalchemy.dialects.postgresql import JSONPATH
+
+from app.pagination import parse_bool
+
+
+OPERATORS = {"eq", "ne", "gt", "gte", "lt", "lte", "exists"}
+COMPARISONS = {"gt": ">", "gte": ">=", "lt": "<", "lte": "<="}
+
+
+def _reject_constant(constant):
+    raise ValueError(f"'{constant}' is not a valid filter value.")
+
+
+def parse_value(value):
+    """Query string values are JSON when they parse as JSON (``1000``, ``true``), strings otherwise.
+
+    ``NaN``, ``Infinity`` and overflowing numbers are rejected: they cannot appear in a jsonpath.
+    """
+    try:
+        parsed = json.loads(value, parse_constant=_reject_constant)
+    except json.JSONDecodeError:
+        return value
+
+    if isinstance(parsed, float) and not math.isfinite(parsed):
+        # Overflowing literals such as 1e999 decode to infinity.
+        _reject_constant(value)
+    return parsed
+
+
+def _nest(path, value):
+    for key in reversed(path):
+        value = {key: value}
+    return value
+
+
+def _jsonpath(path):
+    return "$" + "".join(f".{json.dumps(key)}" for key in path)
+
+
+def _absent_or(column, condition):
+    # NOT on a NULL column is NULL, which would drop the row; a NULL column has no keys at all.
+    return or_(column.is_(None), not_(condition))
+
+
+def json_filter(column, path, operator, value, raw=None):
+    """Translate one filter on a ``JSONB`` column into an operator its GIN index can serve.
+
+    Equality is containment (``@>``), matching the value itself or an array
+    holding it, so ``headers.x-tenant=acme`` matches ``{"x-tenant": ["acme"]}``.
+    When ``raw``, the undecoded query string value, differs from ``value`` it
+    matches as well, so ``config.version=2`` finds both ``2`` and ``"2"``.
+    ``ne`` and ``exists=false`` also match rows without the key, including
+    a NULL column. Comparisons and ``exists`` are SQL/JSON path predicates
+    (``@?``).
+    """
+    if operator == "exists":
+        exists = column.op("@?")(cast(_jsonpath(path), JSONPATH))
+        return exists if value else _absent_or(column, exists)
+
+    if isinstance(value, (dict, list)):
+        raise ValueError(f"The filter on '{'.'.join(path)}' must compare against a single value.")
+
+    if operator in ("eq", "ne"):
+        candidates = [value] if raw is None or raw == value else [value, raw]
+        matches = or_(*(
+            column.contains(_nest(path, candidate_value))
+            for candidate in candidates
+            for candidate_value in (candidate, [candidate])
+        ))
+        return matches if operator == "eq" else _absent_or(column, matches)
+
+    if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+        raise ValueError(f"The '{operator}' filter on '{'.'.join(path)}' must compare against a number or a string.")
+
+    return column.op("@?")(cast(f"{_jsonpath(path)} ? (@ {COMPARISONS[operator]} {json.dumps(value)})", JSONPATH))
+
+
+def json_filters(column, args, prefix, decode=True):
+    """Filters for every ``<prefix>.<key>[.<key>...][__<operator>]=<value>`` query parameter in ``args``.
+
+    For example ``config.minute__gt=1000`` or ``headers.x-tenant__exists=true``.
+    Pass ``decode=False`` for columns that only hold strings, such as route
+    headers, so ``headers.x-version=2`` compares against ``"2"``.
+    """
+    filters = []
+
+    for name, value in args.items(multi=True):
+        if not name.startswith(f"{prefix}."):
+            continue
+
+        field, _, operator = name[len(prefix) + 1:].partition("__")
+        operator = operator or "eq"
+        path = field.split(".")
+
+        if operator not in OPERATORS:
+            raise ValueError(f"Unknown operator '{operator}', expected one of: {', '.join(sorted(OPERATORS))}.")
+        if not all(path):
+            raise ValueError(f"Invalid filter '{name}'.")
+
+        if operator == "exists":
+            filters.append(json_filter(column, path, operator, parse_bool(value, name)))
+        elif decode:
+            filters.append(json_filter(column, path, operator, parse_value(value), raw=value))
+        else:
+            filters.append(json_filter(column, path, operator, value))
+
+    return filters
\ No newline at end of file
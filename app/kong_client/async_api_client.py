@@ -0,0 +1,25 @@
+from app.kong_client.async_client import get_async_kong_client
+
+
+async def create_service_in_kong(data):
+    return await get_async_kong_client().create_service_in_kong(data)
+
+
+async def create_route_in_kong(kong_service_id, data):
+    return await get_async_kong_client().create_route_in_kong(kong_service_id, data)
+
+
+async def update_service_in_kong(kong_service_id, data):
+    return await get_async_kong_client().update_service_in_kong(kong_service_id, data)
+
+
+async def update_route_in_kong(kong_route_id, data):
+    return await get_async_kong_client().update_route_in_kong(kong_route_id, data)
+
+
+async def delete_service_in_kong(kong_service_id):
+    return await get_async_kong_client().delete_service_in_kong(kong_service_id)
+
+
+async def delete_route_in_kong(kong_route_id):
+    return await get_async_kong_client().delete_route_in_kong(kong_route_id)
\ No newline at end of file
@@ -0,0 +1,338 @@
+import asyncio
+import atexit
+import logging
+import os
+import threading
+import time
+
+from flask import current_app
+import httpx
+
+from app.kong_client.breaker import CircuitBreaker, endpoint_class
+from app.metrics import observe_kong
+from app import profiling
+
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+
+def _running_loop():
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+
+
+class AsyncKongAdminClient:
+    """Asyncio client for the Kong Admin API.
+
+    Flask runs every ``async def`` view in a short-lived event loop, which
+    would throw away an ``httpx.AsyncClient`` pool after each request. The
+    client therefore owns one long-lived loop per process, running in a
+    daemon thread; coroutines awaited from any other loop hop onto it for
+    the network I/O, so all requests in the process share one pool and can
+    keep many Kong calls in flight at once.
+    """
+
+    def __init__(self, base_url, pool_size=100, connect_timeout=5, read_timeout=300, concurrency=50, breaker=None):
+        self.base_url = base_url.rstrip("/")
+        self.pool_size = pool_size
+        self.timeout = httpx.Timeout(read_timeout, connect=connect_timeout)
+        self.concurrency = concurrency
+        self.breaker = breaker or CircuitBreaker()
+        self._loop = None
+        self._client = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config, breaker=None):
+        return cls(
+            config["KONG_ADMIN_URL"],
+            pool_size=config["KONG_ASYNC_POOL_SIZE"],
+            connect_timeout=config["KONG_CONNECT_TIMEOUT"],
+            read_timeout=config["KONG_READ_TIMEOUT"],
+            concurrency=config["KONG_CONCURRENCY"],
+            breaker=breaker
+        )
+
+    @property
+    def loop(self):
+        if self._loop is None or self._pid != os.getpid():
+            with self._lock:
+                if self._loop is None or self._pid != os.getpid():
+                    self._start()
+        return self._loop
+
+    def _start(self):
+        loop = asyncio.new_event_loop()
+        thread = threading.Thread(target=loop.run_forever, name="kong-admin-client", daemon=True)
+        thread.start()
+        
+        limits = httpx.Limits(max_connections=self.pool_size, max_keepalive_connections=self.pool_size)
+        
+        async def open_client():
+            return httpx.AsyncClient(base_url=self.base_url, limits=limits, timeout=self.timeout)
+        
+        self._client = asyncio.run_coroutine_threadsafe(open_client(), loop).result()
+        self._loop = loop
+        self._pid = os.getpid()
+        atexit.register(self.close)
+
+    def close(self):
+        if self._loop is None or self._pid != os.getpid():
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self._client.aclose(), self._loop).result(timeout=5)
+        except Exception as e:
+            logger.error(f"Failed to close Kong Admin client: {e}")
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._loop = None
+        self._client = None
+
+    async def request(self, method, path, **kwargs):
+        loop = self.loop
+        if _running_loop() is not loop:
+            # Profiled here, on the caller's side, where the Flask request context is still visible.
+            started = time.monotonic()
+            try:
+                return await asyncio.wrap_future(
+                    asyncio.run_coroutine_threadsafe(self.request(method, path, **kwargs), loop)
+                )
+            finally:
+                profiling.record("kong", time.monotonic() - started)
+        
+        endpoint = endpoint_class(method, path)
+        probe = self.breaker.before_request()
+        kwargs.setdefault("timeout", httpx.Timeout(self.breaker.timeout(endpoint, self.timeout.read), connect=self.timeout.connect))
+        started = time.monotonic()
+        
+        try:
+            response = await self._client.request(method, path, **kwargs)
+        except Exception:
+            elapsed = time.monotonic() - started
+            self.breaker.record(endpoint, elapsed, success=False, probe=probe)
+            observe_kong(endpoint, elapsed)
+            raise
+        
+        elapsed = time.monotonic() - started
+        self.breaker.record(endpoint, elapsed, success=response.status_code < 500, probe=probe)
+        observe_kong(endpoint, elapsed, response.status_code)
+        return response
+
+    async def gather(self, coros, limit=None):
+        """Await ``coros`` with at most ``limit`` (default ``KONG_CONCURRENCY``) in flight."""
+        semaphore = asyncio.Semaphore(limit or self.concurrency)
+
+        async def bounded(coro):
+            async with semaphore:
+                return await coro
+
+        return await asyncio.gather(*(bounded(coro) for coro in coros))
+
+    def submit(self, coro):
+        """Schedule ``coro`` on the client loop and return a ``concurrent.futures.Future``."""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def run(self, coro):
+        """Run ``coro`` on the client loop and block until it finishes (for sync callers)."""
+        return self.submit(coro).result()
+
+    def run_all(self, coros, limit=None):
+        return self.run(self.gather(coros, limit))
+
+    async def list_all_in_kong(self, path, page_size=1000):
+        """Page through a Kong Admin collection (``/services``, ``/routes``, ...) and return every entity."""
+        entities = []
+        params = {"size": page_size}
+        
+        while True:
+            response = await self.request("GET", path, params=params)
+            response.raise_for_status()
+            page = response.json()
+            entities.extend(page.get("data", []))
+            
+            if not page.get("offset"):
+                return entities
+            params = {"size": page_size, "offset": page["offset"]}
+
+    async def create_service_in_kong(self, data):
+        try:
+            create_service_response = await self.request("POST", "/services", json=data)
+            
+            if create_service_response.status_code == 201:
+                kong_service_id = create_service_response.json().get("id")
+                logger.info(f"Service created successfully in Kong Gateway with ID: {kong_service_id}")
+                return kong_service_id, None
+            else:
+                logger.error(f"Failed to create service in Kong Gateway. Status code: {create_service_response.status_code}, Response: {create_service_response.text}")
+                return None, create_service_response.text
+            
+        except httpx.HTTPError as e:
+            logger.error(f"Request failed: {e}")
+            return None, str(e)
+
+        except Exception as e:
+            logger.error(f"An unexpected error occurred: {e}")
+            return None, str(e)
+
+    async def create_route_in_kong(self, kong_service_id, data):
+        try: 
+            create_route_response = await self.request("POST", f"/services/{kong_service_id}/routes", json=data)
+            
+            if create_route_response.status_code == 201:
+                kong_route_id = create_route_response.json().get("id")
+                logger.info(f"Route created successfully in Kong Gateway with ID: {kong_route_id}")
+                return kong_route_id, None
+            else:
+                logger.error(f"Failed to create route in Kong Gateway. Status code: {create_route_response.status_code}, Response: {create_route_response.text}")
+                return None, create_route_response.text
+            
+        except httpx.HTTPError as e:
+            logger.error(f"Request failed: {e}")
+            return None, str(e)
+
+        except Exception as e:
+            logger.error(f"An unexpected error occurred: {e}")
+            return None, str(e)
+
+    async def update_service_in_kong(self, kong_service_id, data):
+        try:
+            update_service_response = await self.request("PATCH", f"/services/{kong_service_id}", json=data)
+                
+            if update_service_response.status_code == 200:
+                logger.info(f"Service with ID: {kong_service_id} successfully updated from Kong Gateway")
+                return "success", None
+            else:
+                logger.error(f"Failed to update service in Kong Gateway. Status code: {update_service_response.status_code}, Response: {update_service_response.text}")
+                return "failure", update_service_response.text
+            
+        except httpx.HTTPError as e:
+            logger.error(f"Request failed: {e}")
+            return "failure", str(e)
+
+        except Exception as e:
+            logger.error(f"An unexpected error occurred: {e}")
+            return "failure", str(e)
+
+    async def update_route_in_kong(self, kong_route_id, data):
+        try:
+            update_route_response = await self.request("PATCH", f"/routes/{kong_route_id}", json=data)
+                
+            if update_route_response.status_code == 200:
+                logger.info(f"Route with ID: {kong_route_id} successfully updated from Kong Gateway")
+                return "success", None
+            else:
+                logger.error(f"Failed to update route in Kong Gateway. Status code: {update_route_response.status_code}, Response: {update_route_response.text}")
+                return "failure", update_route_response.text  
+                        
+        except httpx.HTTPError as e:
+            logger.error(f"Request failed: {e}")
+            return "failure", str(e)
+
+        except Exception as e:
+            logger.error(f"An unexpected error occurred: {e}")
+            return "failure", str(e)
+
+    async def delete_service_in_kong(self, kong_service_id):
+        try:
+            delete_service_response = await self.request("DELETE", f"/services/{kong_service_id}")
+            
+            if delete_service_response.status_code == 204:
+                logger.info(f"Service with ID: {kong_service_id} successfully deleted from Kong Gateway")
+                return "success", None
+            else:
+                logger.error(f"Failed to delete service in Kong Gateway. Status code: {delete_service_response.status_code}, Response: {delete_service_response.text}")
+                return "failure", delete_service_response.text
+                
+        except httpx.HTTPError as e:
+            logger.error(f"Request failed: {e}")
+            return "failure", str(e)
+
+        except Exception as e:
+            logger.error(f"An unexpected error occurred: {e}")
+            return "failure", str(e)
+
+    async def delete_route_in_kong(self, kong_route_id):
+        try:
+            delete_route_response = await self.request("DELETE", f"/routes/{kong_route_id}")
+            
+            if delete_route_response.status_code == 204:
+                logger.info(f"Route with ID: {kong_route_id} successfully deleted from Kong Gateway")
+                return "success", None
+            else:
+                logger.info(f"Failed to delete route in Kong Gateway. Status code: {delete_route_response.status_code}, Response: {delete_route_response.text}")
+                return "failure", delete_route_response.text
+        
+        except httpx.HTTPError as e:
+            logger.error(f"Request failed: {e}")
+            return "failure", str(e)
+
+        except Exception as e:
+            logger.error(f"An unexpected error occurred: {e}")
+            return "failure", str(e)
+
+    async def create_plugin_in_kong(self, kong_service_id, data):
+        try:
+            response = await self.request("POST", f"/services/{kong_service_id}/plugins", json=data)
+            
+            if response.status_code == 201:
+                response_data = response.json()
+                config=response_data.get("config")
+                kong_plugin_id=response_data.get("id")
+                logger.info("Plugin created successfully for API")
+                return config, kong_plugin_id, None
+            else:
+                logger.error(f"Failed to create plugin for API. Status code: {response.status_code}, Response: {response.text}")
+                return None, None, response.text
+        
+        except httpx.HTTPError as e:
+            logger.error(f"Request failed: {e}")
+            return None, None, str(e)
+
+        except Exception as e:
+            logger.error(f"An unexpected error occurred: {e}")
+            return None, None, str(e)
+
+    async def update_plugin_in_kong(self, kong_plugin_id, data):
+        try:
+            response = await self.request("PATCH", f"/plugins/{kong_plugin_id}", json=data)
+            
+            if response.status_code == 200:
+                logger.info("Plugin updated successfully for API")
+                return "success", None
+            else:
+                logger.error(f"Failed to update plugin for API. Status code: {response.status_code}, Response: {response.text}")
+                return "failure", response.text
+                
+        except httpx.HTTPError as e:
+            logger.error(f"Request failed: {e}")
+            return "failure", str(e)
+
+        except Exception as e:
+            logger.error(f"An unexpected error occurred: {e}")
+            return "failure", str(e)
+
+    async def delete_plugin_in_kong(self, kong_plugin_id):
+        try:
+            response = await self.request("DELETE", f"/plugins/{kong_plugin_id}")
+            
+            if response.status_code == 204:
+                logger.info("Plugin deleted successfully for API")
+                return "success", None
+            else:
+                logger.error(f"Failed to delete plugin for API. Status code: {response.status_code}, Response: {response.text}")
+                return "failure", response.text
+                
+        except httpx.HTTPError as e:
+            logger.error(f"Request failed: {e}")
+            return "failure", str(e)
+
+        except Exception as e:
+            logger.error(f"An unexpected error occurred: {e}")
+            return "failure", str(e)
+
+
+def get_async_kong_client():
+    return current_app.extensions["async_kong_client"]
\ No newline at end of file
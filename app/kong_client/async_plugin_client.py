@@ -0,0 +1,13 @@
+from app.kong_client.async_client import get_async_kong_client
+
+
+async def create_plugin_in_kong(kong_service_id, data):
+    return await get_async_kong_client().create_plugin_in_kong(kong_service_id, data)
+
+
+async def update_plugin_in_kong(kong_plugin_id, data):
+    return await get_async_kong_client().update_plugin_in_kong(kong_plugin_id, data)
+
+
+async def delete_plugin_in_kong(kong_plugin_id):
+    return await get_async_kong_client().delete_plugin_in_kong(kong_plugin_id)
\ No newline at end of file
@@ -0,0 +1,208 @@
+import math
+import threading
+import time
+from collections import deque
+
+from flask import request, jsonify, current_app
+
+
+class CircuitOpenError(Exception):
+    def __init__(self, retry_after):
+        super().__init__(f"Kong Admin API is unavailable, retry in {retry_after}s.")
+        self.retry_after = retry_after
+
+
+def endpoint_class(method, path):
+    """Group Kong calls by method and collection, e.g. ``PATCH services``."""
+    return f"{method.upper()} {path.strip('/').split('/', 1)[0]}"
+
+
+def _percentile(samples, percentile):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, math.ceil(percentile / 100 * len(ordered)) - 1)]
+
+
+class LatencyTracker:
+    """Rolling latency window per endpoint class, used to size read timeouts.
+
+    Once an endpoint class has ``min_samples`` observations its read timeout
+    becomes ``multiplier`` times the chosen percentile, clamped between
+    ``min_timeout`` and the configured ceiling. Calls that time out are
+    recorded at the timeout, so the window widens again if Kong slows down
+    for good.
+    """
+
+    def __init__(self, window=200, min_samples=20, percentile=99, multiplier=3, min_timeout=2):
+        self.window = window
+        self.min_samples = min_samples
+        self.percentile = percentile
+        self.multiplier = multiplier
+        self.min_timeout = min_timeout
+        self._samples = {}
+
+    def record(self, endpoint, elapsed):
+        self._samples.setdefault(endpoint, deque(maxlen=self.window)).append(elapsed)
+
+    def timeout(self, endpoint, ceiling):
+        samples = self._samples.get(endpoint)
+        if samples is None or len(samples) < self.min_samples:
+            return ceiling
+        return min(ceiling, max(self.min_timeout, _percentile(samples, self.percentile) * self.multiplier))
+
+    def snapshot(self, ceiling):
+        return {
+            endpoint: {
+                "samples": len(samples),
+                "p50": _percentile(samples, 50),
+                f"p{self.percentile}": _percentile(samples, self.percentile),
+                "timeout": self.timeout(endpoint, ceiling)
+            }
+            for endpoint, samples in self._samples.items()
+        }
+
+
+class CircuitBreaker:
+    """Process-wide circuit breaker shared by the sync and async Kong clients.
+
+    ``failure_threshold`` consecutive transport errors or 5xx responses open
+    the circuit. After ``reset_timeout`` seconds a single half-open probe is
+    let through; its outcome closes the circuit or opens it again. State is
+    kept per process, like the LRU cache.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30, tracker=None):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.tracker = tracker or LatencyTracker()
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self.counters = {"requests": 0, "successes": 0, "failures": 0, "rejected": 0, "opened": 0}
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(
+            failure_threshold=config["KONG_BREAKER_FAILURE_THRESHOLD"],
+            reset_timeout=config["KONG_BREAKER_RESET_TIMEOUT"],
+            tracker=LatencyTracker(
+                window=config["KONG_LATENCY_WINDOW"],
+                min_samples=config["KONG_LATENCY_MIN_SAMPLES"],
+                percentile=config["KONG_TIMEOUT_PERCENTILE"],
+                multiplier=config["KONG_TIMEOUT_MULTIPLIER"],
+                min_timeout=config["KONG_MIN_READ_TIMEOUT"]
+            )
+        )
+
+    def _retry_after(self):
+        if self.state == "closed":
+            return None
+        remaining = self.opened_at + self.reset_timeout - time.monotonic()
+        if remaining <= 0 and not self._probe_in_flight:
+            return None
+        return max(1, math.ceil(remaining))
+
+    def retry_after(self):
+        """Seconds until a call may reach Kong, or ``None`` if one would be let through now."""
+        with self._lock:
+            return self._retry_after()
+
+    def before_request(self):
+        """Admit a call or raise ``CircuitOpenError``; return whether the call is the half-open probe."""
+        with self._lock:
+            retry_after = self._retry_after()
+            if retry_after is not None:
+                self.counters["rejected"] += 1
+                raise CircuitOpenError(retry_after)
+            self.counters["requests"] += 1
+            if self.state != "closed":
+                self.state = "half_open"
+                self._probe_in_flight = True
+                return True
+            return False
+
+    def _open(self):
+        if self.state != "open":
+            self.counters["opened"] += 1
+        self.state = "open"
+        self.opened_at = time.monotonic()
+
+    def record(self, endpoint, elapsed, success, probe=False):
+        with self._lock:
+            self.tracker.record(endpoint, elapsed)
+            self.counters["successes" if success else "failures"] += 1
+
+            if probe:
+                # Only the probe decides whether a half-open circuit closes or opens again;
+                # calls admitted before the circuit opened may still finish either way.
+                self._probe_in_flight = False
+                if success:
+                    self.consecutive_failures = 0
+                    self.state = "closed"
+                    self.opened_at = None
+                else:
+                    self.consecutive_failures += 1
+                    self._open()
+            elif success:
+                self.consecutive_failures = 0
+            else:
+                self.consecutive_failures += 1
+                if self.state == "closed" and self.consecutive_failures >= self.failure_threshold:
+                    self._open()
+
+    def timeout(self, endpoint, ceiling):
+        with self._lock:
+            return self.tracker.timeout(endpoint, ceiling)
+
+    def snapshot(self, ceiling):
+        with self._lock:
+            return {
+                "state": self.state,
+                "consecutive_failures": self.consecutive_failures,
+                "retry_after": self._retry_after(),
+                "counters": dict(self.counters),
+                "endpoints": self.tracker.snapshot(ceiling)
+            }
+
+
+def get_breaker():
+    return current_app.extensions["kong_breaker"]
+
+
+def reject_writes_while_kong_unavailable():
+    """Fail writes fast with ``503 Retry-After`` while the breaker is open, leaving database reads untouched."""
+    if request.method in ("GET", "HEAD", "OPTIONS"):
+        return None
+
+    retry_after = get_breaker().retry_after()
+
+    if retry_after is None:
+        return None
+
+    response = jsonify({
+        "error": "Service unavailable.",
+        "message": "The Kong Admin API is not responding, the request was not attempted."
+    })
+    response.headers["Retry-After"] = str(retry_after)
+    return response, 503
+
+
+def retry_after_while_kong_unavailable(response):
+    """Answer a 500 with ``503 Retry-After`` when the breaker opened or rejected a Kong call during the request.
+
+    The client wrappers report a rejected call as an ordinary error tuple so
+    handlers can still compensate the Kong changes already made; the status
+    is corrected here, once the handler is done.
+    """
+    if response.status_code != 500:
+        return response
+
+    retry_after = get_breaker().retry_after()
+
+    if retry_after is None:
+        return response
+
+    response.status_code = 503
+    response.headers["Retry-After"] = str(retry_after)
+    return response
\ No newline at end of file
@@ -0,0 +1,268 @@
+import logging
+import os
+import threading
+import time
+
+from flask import current_app
+import requests
+from requests.adapters import HTTPAdapter
+
+from app.kong_client.breaker import CircuitBreaker, endpoint_class
+from app.metrics import observe_kong
+from app import profiling
+
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+
+class KongAdminClient:
+    """Keep-alive client for the Kong Admin API.
+
+    One instance is built by ``create_app()`` and shared by every request
+    handled in the process, so consecutive Kong calls reuse pooled
+    connections instead of paying a TCP/TLS handshake each time.
+    """
+
+    def __init__(self, base_url, pool_size=10, connect_timeout=5, read_timeout=300, breaker=None):
+        self.base_url = base_url.rstrip("/")
+        self.pool_size = pool_size
+        self.timeout = (connect_timeout, read_timeout)
+        self.breaker = breaker or CircuitBreaker()
+        self._session = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config, breaker=None):
+        return cls(
+            config["KONG_ADMIN_URL"],
+            pool_size=config["KONG_POOL_SIZE"],
+            connect_timeout=config["KONG_CONNECT_TIMEOUT"],
+            read_timeout=config["KONG_READ_TIMEOUT"],
+            breaker=breaker
+        )
+
+    @property
+    def session(self):
+        # Sockets must not be shared with a forked child (gunicorn --preload,
+        # Celery prefork), so each process lazily builds its own pool.
+        if self._session is None or self._pid != os.getpid():
+            with self._lock:
+                if self._session is None or self._pid != os.getpid():
+                    session = requests.Session()
+                    adapter = HTTPAdapter(
+                        pool_connections=1,
+                        pool_maxsize=self.pool_size,
+                        pool_block=True
+                    )
+                    session.mount("http://", adapter)
+                    session.mount("https://", adapter)
+                    self._session = session
+                    self._pid = os.getpid()
+        return self._session
+
+    def request(self, method, path, **kwargs):
+        endpoint = endpoint_class(method, path)
+        probe = self.breaker.before_request()
+        kwargs.setdefault("timeout", (self.timeout[0], self.breaker.timeout(endpoint, self.timeout[1])))
+        started = time.monotonic()
+        
+        try:
+            response = self.session.request(method, f"{self.base_url}{path}", **kwargs)
+        except Exception:
+            elapsed = time.monotonic() - started
+            self.breaker.record(endpoint, elapsed, success=False, probe=probe)
+            observe_kong(endpoint, elapsed)
+            raise
+        
+        elapsed = time.monotonic() - started
+        self.breaker.record(endpoint, elapsed, success=response.status_code < 500, probe=probe)
+        observe_kong(endpoint, elapsed, response.status_code)
+        profiling.record("kong", elapsed)
+        return response
+
+    def close(self):
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+
+    def create_service_in_kong(self, data):
+        try:
+            create_service_response = self.request("POST", "/services", json=data)
+            
+            if create_service_response.status_code == 201:
+                kong_service_id = create_service_response.json().get("id")
+                logger.info(f"Service created successfully in Kong Gateway with ID: {kong_service_id}")
+                return kong_service_id, None
+            else:
+                logger.error(f"Failed to create service in Kong Gateway. Status code: {create_service_response.status_code}, Response: {create_service_response.text}")
+                return None, create_service_response.text
+            
+        except requests.RequestException as e:
+            logger.error(f"Request failed: {e}")
+            return None, str(e)
+
+        except Exception as e:
+            logger.error(f"An unexpected error occurred: {e}")
+            return None, str(e)
+
+    def create_route_in_kong(self, kong_service_id, data):
+        try: 
+            create_route_response = self.request("POST", f"/services/{kong_service_id}/routes", json=data)
+            
+            if create_route_response.status_code == 201:
+                kong_route_id = create_route_response.json().get("id")
+                logger.info(f"Route created successfully in Kong Gateway with ID: {kong_route_id}")
+                return kong_route_id, None
+            else:
+                logger.error(f"Failed to create route in Kong Gateway. Status code: {create_route_response.status_code}, Response: {create_route_response.text}")
+                return None, create_route_response.text
+            
+        except requests.RequestException as e:
+            logger.error(f"Request failed: {e}")
+            return None, str(e)
+
+        except Exception as e:
+            logger.error(f"An unexpected error occurred: {e}")
+            return None, str(e)
+
+    def update_service_in_kong(self, kong_service_id, data):
+        try:
+            update_service_response = self.request("PATCH", f"/services/{kong_service_id}", json=data)
+                
+            if update_service_response.status_code == 200:
+                logger.info(f"Service with ID: {kong_service_id} successfully updated from Kong Gateway")
+                return "success", None
+            else:
+                logger.error(f"Failed to update service in Kong Gateway. Status code: {update_service_response.status_code}, Response: {update_service_response.text}")
+                return "failure", update_service_response.text
+            
+        except requests.RequestException as e:
+            logger.error(f"Request failed: {e}")
+            return "failure", str(e)
+
+        except Exception as e:
+            logger.error(f"An unexpected error occurred: {e}")
+            return "failure", str(e)
+
+    def update_route_in_kong(self, kong_route_id, data):
+        try:
+            update_route_response = self.request("PATCH", f"/routes/{kong_route_id}", json=data)
+                
+            if update_route_response.status_code == 200:
+                logger.info(f"Route with ID: {kong_route_id} successfully updated from Kong Gateway")
+                return "success", None
+            else:
+                logger.error(f"Failed to update route in Kong Gateway. Status code: {update_route_response.status_code}, Response: {update_route_response.text}")
+                return "failure", update_route_response.text  
+                        
+        except requests.RequestException as e:
+            logger.error(f"Request failed: {e}")
+            return "failure", str(e)
+
+        except Exception as e:
+            logger.error(f"An unexpected error occurred: {e}")
+            return "failure", str(e)
+
+    def delete_service_in_kong(self, kong_service_id):
+        try:
+            delete_service_response = self.request("DELETE", f"/services/{kong_service_id}")
+            
+            if delete_service_response.status_code == 204:
+                logger.info(f"Service with ID: {kong_service_id} successfully deleted from Kong Gateway")
+                return "success", None
+            else:
+                logger.error(f"Failed to delete service in Kong Gateway. Status code: {delete_service_response.status_code}, Response: {delete_service_response.text}")
+                return "failure", delete_service_response.text
+                
+        except requests.RequestException as e:
+            logger.error(f"Request failed: {e}")
+            return "failure", str(e)
+
+        except Exception as e:
+            logger.error(f"An unexpected error occurred: {e}")
+            return "failure", str(e)
+
+    def delete_route_in_kong(self, kong_route_id):
+        try:
+            delete_route_response = self.request("DELETE", f"/routes/{kong_route_id}")
+            
+            if delete_route_response.status_code == 204:
+                logger.info(f"Route with ID: {kong_route_id} successfully deleted from Kong Gateway")
+                return "success", None
+            else:
+                logger.info(f"Failed to delete route in Kong Gateway. Status code: {delete_route_response.status_code}, Response: {delete_route_response.text}")
+                return "failure", delete_route_response.text
+        
+        except requests.RequestException as e:
+            logger.error(f"Request failed: {e}")
+            return "failure", str(e)
+
+        except Exception as e:
+            logger.error(f"An unexpected error occurred: {e}")
+            return "failure", str(e)
+
+    def create_plugin_in_kong(self, kong_service_id, data):
+        try:
+            response = self.request("POST", f"/services/{kong_service_id}/plugins", json=data)
+            
+            if response.status_code == 201:
+                response_data = response.json()
+                config=response_data.get("config")
+                kong_plugin_id=response_data.get("id")
+                logger.info("Plugin created successfully for API")
+                return config, kong_plugin_id, None
+            else:
+                logger.error(f"Failed to create plugin for API. Status code: {response.status_code}, Response: {response.text}")
+                return None, None, response.text
+        
+        except requests.RequestException as e:
+            logger.error(f"Request failed: {e}")
+            return None, None, str(e)
+
+        except Exception as e:
+            logger.error(f"An unexpected error occurred: {e}")
+            return None, None, str(e)
+
+    def update_plugin_in_kong(self, kong_plugin_id, data):
+        try:
+            response = self.request("PATCH", f"/plugins/{kong_plugin_id}", json=data)
+            
+            if response.status_code == 200:
+                logger.info("Plugin updated successfully for API")
+                return "success", None
+            else:
+                logger.error(f"Failed to update plugin for API. Status code: {response.status_code}, Response: {response.text}")
+                return "failure", response.text
+                
+        except requests.RequestException as e:
+            logger.error(f"Request failed: {e}")
+            return "failure", str(e)
+
+        except Exception as e:
+            logger.error(f"An unexpected error occurred: {e}")
+            return "failure", str(e)
+
+    def delete_plugin_in_kong(self, kong_plugin_id):
+        try:
+            response = self.request("DELETE", f"/plugins/{kong_plugin_id}")
+            
+            if response.status_code == 204:
+                logger.info("Plugin deleted successfully for API")
+                return "success", None
+            else:
+                logger.error(f"Failed to delete plugin for API. Status code: {response.status_code}, Response: {response.text}")
+                return "failure", response.text
+                
+        except requests.RequestException as e:
+            logger.error(f"Request failed: {e}")
+            return "failure", str(e)
+
+        except Exception as e:
+            logger.error(f"An unexpected error occurred: {e}")
+            return "failure", str(e)
+
+
+def get_kong_client():
+    return current_app.extensions["kong_client"]
\ No newline at end of file
@@ -0,0 +1,116 @@
+import os
+import time
+
+from flask import request, g, Response
+from prometheus_client import (
+    CollectorRegistry, Counter, Gauge, Histogram, REGISTRY,
+    CONTENT_TYPE_LATEST, generate_latest, multiprocess
+)
+from sqlalchemy import event
+
+from app.extensions import db
+from app import profiling
+
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300)
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds", "Flask request latency.",
+    ["endpoint", "method", "status"], buckets=LATENCY_BUCKETS
+)
+KONG_REQUEST_SECONDS = Histogram(
+    "kong_admin_request_duration_seconds", "Kong Admin API call latency per endpoint class.",
+    ["endpoint", "status"], buckets=LATENCY_BUCKETS
+)
+SQL_QUERY_SECONDS = Histogram(
+    "sql_query_duration_seconds", "SQL statement latency.",
+    ["pool", "operation"], buckets=LATENCY_BUCKETS
+)
+DB_POOL_CHECKOUT_WAIT = Histogram(
+    "db_pool_checkout_wait_seconds", "Time spent waiting for a pooled connection.",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30)
+)
+DB_POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out_connections", "Connections currently checked out of the pool.",
+    ["pool"], multiprocess_mode="livesum"
+)
+DB_POOL_CAPACITY = Gauge(
+    "db_pool_capacity_connections", "Pool size plus allowed overflow.",
+    ["pool"], multiprocess_mode="livesum"
+)
+ROLLBACK_TASKS = Counter(
+    "rollback_tasks_total", "Rollback task outcomes.",
+    ["task", "outcome"]
+)
+ROLLBACK_RETRIES = Counter(
+    "rollback_task_retries_total", "Rollback task retries scheduled.",
+    ["task"]
+)
+
+
+def _status_class(status_code):
+    return f"{status_code // 100}xx" if status_code else "error"
+
+
+def observe_kong(endpoint, elapsed, status_code=None):
+    KONG_REQUEST_SECONDS.labels(endpoint, _status_class(status_code)).observe(elapsed)
+
+
+def _before_request():
+    g.request_started = time.perf_counter()
+
+
+def _after_request(response):
+    started = g.pop("request_started", None)
+    if started is not None:
+        HTTP_REQUEST_SECONDS.labels(
+            request.endpoint or "unmatched", request.method, str(response.status_code)
+        ).observe(time.perf_counter() - started)
+    return response
+
+
+def instrument_engine(engine, name):
+    """Time every statement and track checkouts of ``engine``'s pool under the ``name`` label."""
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["query_started"].pop()
+        operation = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "UNKNOWN"
+        elapsed = time.perf_counter() - started
+        SQL_QUERY_SECONDS.labels(name, operation).observe(elapsed)
+        profiling.record("sql", elapsed)
+
+    pool = engine.pool
+    capacity = pool.size() + max(getattr(pool, "_max_overflow", 0), 0) if hasattr(pool, "size") else 0
+
+    @event.listens_for(pool, "checkout")
+    def checkout(dbapi_connection, connection_record, connection_proxy):
+        DB_POOL_CAPACITY.labels(name).set(capacity)
+        DB_POOL_CHECKED_OUT.labels(name).inc()
+
+    @event.listens_for(pool, "checkin")
+    def checkin(dbapi_connection, connection_record):
+        DB_POOL_CHECKED_OUT.labels(name).dec()
+
+
+def metrics():
+    # Under gunicorn or Celery prefork every process writes its samples to
+    # PROMETHEUS_MULTIPROC_DIR, and the scrape aggregates all of them.
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return Response(generate_latest(registry), content_type=CONTENT_TYPE_LATEST)
+
+
+def init_metrics(app):
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    app.add_url_rule("/metrics", "metrics", metrics)
+
+    with app.app_context():
+        instrument_engine(db.engine, "default")
\ No newline at end of file
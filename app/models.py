@@ -2,11 +2,12 @@ from datetime import datetime, timezone
 from typing import Optional
 import uuid
 
-from sqlalchemy import String, Integer, Boolean, ARRAY, JSON, ForeignKey
-from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy.inspection import inspect
+from sqlalchemy import String, Integer, BigInteger, Boolean, ARRAY, JSON, ForeignKey, Index, Identity
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Mapped, mapped_column, relationship, selectinload, joinedload
 
 from app.extensions import db
+from app.serializers import model_to_dict
 
 
 class TimestampMixin:
@@ -23,26 +24,68 @@ class TimestampMixin:
     )
 
 
+class PluginConfig(db.Model):
+    """A plugin config stored once, keyed by the SHA-256 of its canonical JSON."""
+    __tablename__ = "plugin_config"
+    __table_args__ = (
+        Index("ix_plugin_config_config", "config", postgresql_using="gin", postgresql_ops={"config": "jsonb_path_ops"}),
+    )
+    
+    hash: Mapped[str] = mapped_column(String(64), primary_key=True)
+    config: Mapped[dict] = mapped_column(JSONB, nullable=False)
+
+
 class PluginAPIConfiguration(TimestampMixin, db.Model):
     __tablename__ = "plugin_api_configuration"
+    __table_args__ = (
+        Index("ix_plugin_api_configuration_updated_at", "updated_at"),
+        Index("ix_plugin_api_configuration_config_hash", "config_hash"),
+    )
     
     plugin_id: Mapped[str] = mapped_column(ForeignKey("plugin.id"), primary_key=True)
     api_id: Mapped[str] = mapped_column(ForeignKey("api.id"), primary_key=True)     
-    config: Mapped[dict] = mapped_column(JSON, nullable=False)
+    config_hash: Mapped[str] = mapped_column(ForeignKey("plugin_config.hash"), nullable=False)
     enabled: Mapped[bool] = mapped_column(Boolean, default=True)
     kong_plugin_id: Mapped[Optional[str]] = mapped_column(String(36))
     plugin: Mapped["Plugin"] = relationship(back_populates="apis")
     api: Mapped["API"] = relationship(back_populates="plugins")
+    # Lazy by default; queries that serialize configs load it with eager_plugins() or joinedload.
+    config_blob: Mapped["PluginConfig"] = relationship()
+    
+    
+    @property
+    def config(self) -> dict:
+        return self.config_blob.config
+    
+    
+    def to_dict(self) -> dict:
+        plugin_data = self.plugin.to_dict()
+        plugin_data.update({
+            "config": self.config,
+            "enabled": self.enabled,
+            "kong_plugin_id": self.kong_plugin_id,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at
+        })
+        return plugin_data
 
 
 class API(TimestampMixin, db.Model):
     __tablename__ = "api"
+    __table_args__ = (
+        Index("ix_api_created_at_id", "created_at", "id"),
+        Index("ix_api_updated_at", "updated_at"),
+        Index("ix_api_name_pattern", "name", postgresql_ops={"name": "varchar_pattern_ops"}),
+        Index("ix_api_path_pattern", "path", postgresql_ops={"path": "varchar_pattern_ops"}),
+        Index("ix_api_methods", "methods", postgresql_using="gin"),
+        Index("ix_api_headers", "headers", postgresql_using="gin"),
+    )
 
     id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))  
     name: Mapped[Optional[str]] = mapped_column(String(255), unique=True, nullable=True)  
     url: Mapped[str] = mapped_column(String, unique=True, nullable=False)
     path: Mapped[str] = mapped_column(String, unique=True, nullable=False) 
-    headers: Mapped[Optional[dict]] = mapped_column(JSON, nullable=True)
+    headers: Mapped[Optional[dict]] = mapped_column(JSONB, nullable=True)
     methods: Mapped[Optional[list[str]]] = mapped_column(ARRAY(String(10)), nullable=True)
     enabled: Mapped[bool] = mapped_column(Boolean, default=True)
     kong_service_id: Mapped[Optional[str]] = mapped_column(String(36))
@@ -54,12 +97,15 @@ class API(TimestampMixin, db.Model):
 
     
     def to_dict(self) -> dict:
-        columns = [column.key for column in inspect(self).mapper.column_attrs]
-        return {column: getattr(self, column) for column in columns}
+        return model_to_dict(self)
 
 
-class Plugin(db.Model):
+class Plugin(TimestampMixin, db.Model):
     __tablename__ = "plugin"
+    __table_args__ = (
+        Index("ix_plugin_created_at_id", "created_at", "id"),
+        Index("ix_plugin_updated_at", "updated_at"),
+    )
     
     id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))  
     name: Mapped[str] = mapped_column(String(50), unique=True, nullable=False)
@@ -67,5 +113,73 @@ class Plugin(db.Model):
     
     
     def to_dict(self) -> dict:
-        columns = [column.key for column in inspect(self).mapper.column_attrs]
-        return {column: getattr(self, column) for column in columns}
\ No newline at end of file
+        return model_to_dict(self)
+
+
+class RollbackTask(TimestampMixin, db.Model):
+    __tablename__ = "rollback_task"
+    __table_args__ = (
+        Index("ix_rollback_task_status_created_at_id", "status", "created_at", "id"),
+        Index("ix_rollback_task_created_at_id", "created_at", "id"),
+        Index("ix_rollback_task_entity_key_sequence", "entity_key", "sequence"),
+    )
+
+    id: Mapped[str] = mapped_column(String(155), primary_key=True)
+    name: Mapped[str] = mapped_column(String(255), nullable=False)
+    entity_key: Mapped[Optional[str]] = mapped_column(String(255))
+    sequence: Mapped[int] = mapped_column(BigInteger, Identity(), nullable=False)
+    args: Mapped[list] = mapped_column(JSON, nullable=False)
+    status: Mapped[str] = mapped_column(String(20), nullable=False)
+    attempts: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    last_error: Mapped[Optional[str]] = mapped_column(String)
+
+
+    def to_dict(self) -> dict:
+        return model_to_dict(self)
+
+
+class Job(TimestampMixin, db.Model):
+    __tablename__ = "job"
+    __table_args__ = (
+        Index("ix_job_status_updated_at", "status", "updated_at"),
+    )
+
+    id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    method: Mapped[str] = mapped_column(String(10), nullable=False)
+    path: Mapped[str] = mapped_column(String, nullable=False)
+    payload: Mapped[Optional[dict]] = mapped_column(JSON)
+    headers: Mapped[Optional[dict]] = mapped_column(JSON)
+    status: Mapped[str] = mapped_column(String(20), nullable=False)
+    status_code: Mapped[Optional[int]] = mapped_column(Integer)
+    result: Mapped[Optional[dict]] = mapped_column(JSON)
+
+
+    def to_dict(self) -> dict:
+        # The replayed headers may carry credentials, so they are not exposed.
+        job_data = model_to_dict(self)
+        job_data.pop("headers")
+        return job_data
+
+
+class IdempotencyKey(TimestampMixin, db.Model):
+    __tablename__ = "idempotency_key"
+    __table_args__ = (
+        Index("ix_idempotency_key_expires_at", "expires_at"),
+    )
+
+    key: Mapped[str] = mapped_column(String(255), primary_key=True)
+    request_hash: Mapped[str] = mapped_column(String(40), nullable=False)
+    status: Mapped[str] = mapped_column(String(20), nullable=False)
+    status_code: Mapped[Optional[int]] = mapped_column(Integer)
+    mimetype: Mapped[Optional[str]] = mapped_column(String(100))
+    headers: Mapped[Optional[dict]] = mapped_column(JSON)
+    body: Mapped[Optional[str]] = mapped_column(String)
+    expires_at: Mapped[int] = mapped_column(Integer, nullable=False)
+
+
+def eager_plugins():
+    """Loader option fetching an API's plugin configurations, plugin names and configs in one extra query."""
+    return selectinload(API.plugins).options(
+        joinedload(PluginAPIConfiguration.plugin),
+        joinedload(PluginAPIConfiguration.config_blob)
+    )
@@ -0,0 +1,62 @@
+import base64
+import json
+
+from flask import current_app as app
+from sqlalchemy import tuple_
+
+
+def encode_cursor(created_at, id):
+    raw = json.dumps([created_at, id], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, id = json.loads(raw)
+        return int(created_at), str(id)
+    except (ValueError, TypeError):
+        raise ValueError("Invalid pagination cursor.")
+
+
+def parse_limit(value):
+    if value is None:
+        return app.config["PAGINATION_DEFAULT_LIMIT"]
+    try:
+        limit = int(value)
+    except ValueError:
+        raise ValueError("The 'limit' parameter must be an integer.")
+    if limit < 1:
+        raise ValueError("The 'limit' parameter must be positive.")
+    return min(limit, app.config["PAGINATION_MAX_LIMIT"])
+
+
+def parse_bool(value, name):
+    if value is None:
+        return None
+    if value.lower() in ("true", "1"):
+        return True
+    if value.lower() in ("false", "0"):
+        return False
+    raise ValueError(f"The '{name}' parameter must be 'true' or 'false'.")
+
+
+def keyset_page(statement, model, limit, cursor=None):
+    """Restrict ``statement`` to the page after ``cursor``, ordered by ``(created_at, id)``.
+
+    The row comparison lets Postgres seek straight to the cursor through the
+    ``(created_at, id)`` index, so every page costs the same however deep it
+    is. One extra row is fetched to tell whether a next page exists.
+    """
+    if cursor:
+        statement = statement.where(
+            tuple_(model.created_at, model.id) > tuple_(*decode_cursor(cursor))
+        )
+    return statement.order_by(model.created_at, model.id).limit(limit + 1)
+
+
+def next_cursor(rows, limit):
+    if len(rows) <= limit:
+        return None
+    last = rows[limit - 1]
+    return encode_cursor(last.created_at, last.id)
\ No newline at end of file
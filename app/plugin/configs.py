@@ -0,0 +1,59 @@
+import hashlib
+import json
+
+from sqlalchemy.dialects.postgresql import insert
+
+from app.extensions import db
+from app.models import PluginConfig
+
+
+def config_hash(config):
+    """SHA-256 of the canonical JSON form of ``config``: sorted keys, no whitespace."""
+    canonical = json.dumps(config, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def merge_config(current, changes):
+    merged = dict(current or {})
+    for key, value in changes.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = merge_config(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+
+def store_configs(configs):
+    """Store every config not stored yet with one INSERT and return their hashes, in order.
+
+    Existing blobs are locked rather than skipped: the no-op update holds
+    them until the caller commits, so sweep_orphan_plugins cannot delete one
+    the caller is about to reference. Rows are sorted by hash to keep
+    concurrent writers from deadlocking.
+    """
+    hashes = [config_hash(config) for config in configs]
+    blobs = dict(zip(hashes, configs))
+
+    if blobs:
+        statement = insert(PluginConfig).values([
+            {"hash": hash, "config": blobs[hash]} for hash in sorted(blobs)
+        ])
+        db.session.execute(
+            statement.on_conflict_do_update(
+                index_elements=[PluginConfig.hash],
+                set_={"hash": statement.excluded.hash}
+            )
+        )
+
+    return hashes
+
+
+def store_config(config):
+    return store_configs([config])[0]
+
+
+def load_configs(hashes):
+    """Return ``{hash: config}`` for ``hashes``, reading each distinct blob once."""
+    return dict(db.session.execute(
+        db.select(PluginConfig.hash, PluginConfig.config).where(PluginConfig.hash.in_(set(hashes)))
+    ).all())
\ No newline at end of file
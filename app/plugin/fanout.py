@@ -0,0 +1,224 @@
+import logging
+
+from flask import jsonify, current_app as app
+from sqlalchemy import and_, or_, true, insert, update, delete
+
+from app.extensions import db
+from app.models import API, Plugin, PluginAPIConfiguration
+from app.cache import invalidate_api_plugins
+from app.events import delete_orphan_plugins
+from app.kong_client.async_client import get_async_kong_client
+from app.plugin.configs import config_hash, merge_config, store_configs, load_configs
+
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+SELECTOR_KEYS = ("ids", "name_prefix", "path_prefix", "all")
+
+
+def _failure(api_id, status, error, message=None):
+    return {
+        "api_id": api_id,
+        "status": status,
+        "error": error,
+        **({"message": message} if message else {})
+    }
+
+
+def selector_clause(selector):
+    """Translate a fan-out selector into a WHERE clause on ``API``."""
+    if not isinstance(selector, dict) or len(selector) != 1 or next(iter(selector)) not in SELECTOR_KEYS:
+        raise ValueError(f"The 'selector' field must be an object with exactly one of: {', '.join(SELECTOR_KEYS)}.")
+
+    key, value = next(iter(selector.items()))
+
+    if key == "ids":
+        if not isinstance(value, list) or not value:
+            raise ValueError("The 'ids' selector must be a non-empty list of API ids or names.")
+        return or_(API.id.in_(value), API.name.in_(value))
+    if key == "name_prefix":
+        return API.name.startswith(str(value), autoescape=True)
+    if key == "path_prefix":
+        return API.path.startswith(str(value), autoescape=True)
+    if value is not True:
+        raise ValueError("The 'all' selector must be true.")
+    return true()
+
+
+def fanout_validator(allowed_fields_key=None):
+    """Build a validator for a fan-out body: a selector plus the plugin fields ``allowed_fields_key`` permits."""
+    def validate(data):
+        if not isinstance(data, dict):
+            raise ValueError("Invalid JSON data.")
+
+        selector_clause(data.get("selector"))
+
+        allowed_fields = set(app.config[allowed_fields_key]) - {"name"} if allowed_fields_key else set()
+        unknown_fields = {
+            field: "unknown field" for field in data.keys()
+            if field != "selector" and field not in allowed_fields
+        }
+
+        if unknown_fields:
+            return jsonify({
+                "error": "schema violation",
+                "fields": unknown_fields
+            }), 400
+
+        if "config" in data and not isinstance(data["config"], dict):
+            return jsonify({
+                "error": "schema violation",
+                "fields": {"config": "must be an object"}
+            }), 400
+
+    return validate
+
+
+def load_targets(selector, plugin_id):
+    """Select the matching APIs and their existing attachment of ``plugin_id`` in one query."""
+    targets = db.session.execute(
+        db.select(
+            API.id, API.name, API.kong_service_id, PluginAPIConfiguration.kong_plugin_id,
+            PluginAPIConfiguration.config_hash, PluginAPIConfiguration.enabled
+        )
+        .outerjoin(
+            PluginAPIConfiguration,
+            and_(
+                PluginAPIConfiguration.api_id == API.id,
+                PluginAPIConfiguration.plugin_id == plugin_id
+            )
+        )
+        .where(selector_clause(selector))
+        .order_by(API.created_at, API.id)
+    ).all()
+
+    if len(targets) > app.config["PLUGIN_FANOUT_MAX_APIS"]:
+        raise ValueError(f"The selector matches {len(targets)} APIs, a fan-out request accepts at most {app.config['PLUGIN_FANOUT_MAX_APIS']}.")
+
+    return targets
+
+
+async def run_in_kong(call, targets):
+    """Run ``call(target)`` for every target with at most ``PLUGIN_FANOUT_CONCURRENCY`` in flight."""
+    kong = get_async_kong_client()
+    outcomes = await kong.gather(
+        [call(kong, target) for target in targets],
+        limit=app.config["PLUGIN_FANOUT_CONCURRENCY"]
+    )
+    return list(zip(targets, outcomes))
+
+
+async def compensate_creations(kong_plugin_ids):
+    """Remove plugins created in Kong whose rows could not be committed."""
+    kong = get_async_kong_client()
+    outcomes = await kong.gather(
+        [kong.delete_plugin_in_kong(kong_plugin_id) for kong_plugin_id in kong_plugin_ids],
+        limit=app.config["PLUGIN_FANOUT_CONCURRENCY"]
+    )
+    for kong_plugin_id, (status, error) in zip(kong_plugin_ids, outcomes):
+        if status == "failure":
+            logger.error(f"Plugin with ID: {kong_plugin_id} was created in Kong Gateway but could not be removed: {error}")
+
+
+def insert_attachments(plugin_name, created):
+    """Insert every new ``PluginAPIConfiguration`` row with one multi-row INSERT."""
+    plugin = db.session.execute(
+        db.select(Plugin).where(Plugin.name == plugin_name)
+    ).scalar()
+
+    if plugin is None:
+        plugin = Plugin(name=plugin_name)
+        db.session.add(plugin)
+        db.session.flush()
+
+    hashes = store_configs([config for _, config, _ in created])
+    db.session.execute(insert(PluginAPIConfiguration), [
+        {
+            "plugin_id": plugin.id,
+            "api_id": api_id,
+            "config_hash": hash,
+            "enabled": True,
+            "kong_plugin_id": kong_plugin_id
+        }
+        for (api_id, _, kong_plugin_id), hash in zip(created, hashes)
+    ])
+    return plugin.id
+
+
+def plan_updates(targets, data):
+    """Split ``targets`` into those ``data`` would change and those it leaves as they are.
+
+    Returns ``(changed, unchanged, configs)``: ``changed`` pairs each target
+    with its new ``(config_hash, enabled)``, and ``configs`` maps every new
+    hash to its config. Attachments share a handful of configs, so each
+    distinct current config is read and merged once.
+    """
+    if "config" in data and not isinstance(data["config"], dict):
+        raise ValueError("The 'config' field must be an object.")
+
+    current = load_configs(target.config_hash for target in targets) if "config" in data else {}
+    merged = {
+        hash: merge_config(config, data["config"])
+        for hash, config in current.items()
+    }
+    configs = {config_hash(config): config for config in merged.values()}
+    new_hashes = {hash: config_hash(config) for hash, config in merged.items()}
+
+    changed, unchanged = [], []
+    for target in targets:
+        values = (
+            new_hashes.get(target.config_hash, target.config_hash),
+            data.get("enabled", target.enabled)
+        )
+        if values == (target.config_hash, target.enabled):
+            unchanged.append(target)
+        else:
+            changed.append((target, values))
+
+    return changed, unchanged, configs
+
+
+def update_attachments(plugin_id, updated, configs):
+    """Write ``updated`` (``(api_id, (config_hash, enabled))`` pairs) with one UPDATE per distinct value."""
+    store_configs([configs[hash] for hash in {hash for _, (hash, _) in updated} if hash in configs])
+
+    groups = {}
+    for api_id, values in updated:
+        groups.setdefault(values, []).append(api_id)
+
+    for (hash, enabled), api_ids in groups.items():
+        db.session.execute(
+            update(PluginAPIConfiguration)
+            .where(
+                PluginAPIConfiguration.plugin_id == plugin_id,
+                PluginAPIConfiguration.api_id.in_(api_ids)
+            )
+            .values(config_hash=hash, enabled=enabled)
+        )
+
+
+def delete_attachments(plugin_id, api_ids):
+    db.session.execute(
+        delete(PluginAPIConfiguration)
+        .where(
+            PluginAPIConfiguration.plugin_id == plugin_id,
+            PluginAPIConfiguration.api_id.in_(api_ids)
+        )
+    )
+    # A Core DELETE bypasses the after_flush hook, so clean up here.
+    delete_orphan_plugins(db.session.connection(), [plugin_id])
+
+
+def invalidate(api_ids):
+    for api_id in api_ids:
+        invalidate_api_plugins(api_id)
+
+
+def summarize(results):
+    failed = sum(1 for result in results if result["status"] >= 400)
+    return jsonify({
+        "succeeded": len(results) - failed,
+        "failed": failed,
+        "results": results
+    }), 207 if failed else 200
\ No newline at end of file
@@ -1,20 +1,54 @@
 from app.plugin import plugin
 from flask import request, jsonify, current_app as app
-from app.models import API, Plugin, PluginAPIConfiguration
+from app.models import API, Plugin, PluginAPIConfiguration, PluginConfig, eager_plugins
 from app.extensions import db
-from sqlalchemy import or_
-from app.kong_client.plugin_client import create_plugin_in_kong, update_plugin_in_kong, delete_plugin_in_kong
+from app.pagination import keyset_page, next_cursor, parse_limit
+from app.json_filters import json_filters
+from app.cache import cached_api_id, cache_api, get_cached_api_plugins, cache_api_plugins, invalidate_api_plugins
+from app.serializers import columns, rows_to_dicts, json_response
+from app.etag import make_etag, table_validator, is_fresh, not_modified, tag
+from sqlalchemy import or_, func
+from sqlalchemy.orm import joinedload
+from app.kong_client.async_plugin_client import create_plugin_in_kong, update_plugin_in_kong, delete_plugin_in_kong
+from app.jobs.respond_async import respond_async, fields_validator
+from app.idempotency import idempotent
+from app.plugin.configs import config_hash, merge_config, store_config
+from app.plugin.fanout import (
+    fanout_validator, load_targets, run_in_kong, compensate_creations,
+    insert_attachments, plan_updates, update_attachments, delete_attachments, invalidate, summarize, _failure
+)
 
 
 @plugin.route("/plugins")
 def list_plugins():
     try:
-        plugins_list = Plugin.query.all()
-        plugins_data = [plugin.to_dict() for plugin in plugins_list]
+        etag = make_etag("plugins", request.query_string.decode(), *table_validator(Plugin))
+        
+        if is_fresh(etag):
+            return not_modified(etag, weak=True)
+        
+        limit = parse_limit(request.args.get("limit"))
+        statement = db.select(*columns(Plugin))
+        
+        prefix = request.args.get("name")
+        if prefix:
+            statement = statement.where(Plugin.name.startswith(prefix, autoescape=True))
+        
+        plugins_list = db.session.execute(
+            keyset_page(statement, Plugin, limit, request.args.get("cursor"))
+        ).all()
+        plugins_data = rows_to_dicts(plugins_list[:limit])
 
+        return tag(json_response({
+            "plugins": plugins_data,
+            "next_cursor": next_cursor(plugins_list, limit)
+        }), etag, weak=True), 200
+    
+    except ValueError as e:
         return jsonify({
-            "plugins": plugins_data
-        }), 200
+            "error": "Invalid data.",
+            "message": str(e)
+        }), 400
 
     except Exception as e:
         return jsonify({
@@ -37,10 +71,14 @@ def get_plugin(plugin_identifier):
             }), 404
             
         plugin_data = plugin.to_dict()
+        etag = make_etag("plugin", plugin_data)
         
-        return jsonify({
+        if is_fresh(etag):
+            return not_modified(etag)
+        
+        return tag(jsonify({
             "plugin": plugin_data
-        })
+        }), etag)
         
     except Exception as e:
         return jsonify({
@@ -55,6 +93,23 @@ def get_plugin(plugin_identifier):
 @plugin.route("/plugins/<plugin_identifier>/apis")
 def list_apis_using_plugin(plugin_identifier):
     try:
+        validator = db.session.execute(
+            db.select(func.max(API.updated_at), func.max(PluginAPIConfiguration.updated_at), func.count())
+            .select_from(PluginAPIConfiguration)
+            .join(Plugin, Plugin.id == PluginAPIConfiguration.plugin_id)
+            .join(API, API.id == PluginAPIConfiguration.api_id)
+            .where(
+                or_(
+                    Plugin.id == plugin_identifier,
+                    Plugin.name == plugin_identifier
+                )
+            )
+        ).one()
+        etag = make_etag("plugin-apis", plugin_identifier, request.query_string.decode(), *validator)
+        
+        if is_fresh(etag):
+            return not_modified(etag, weak=True)
+        
         plugin = db.session.execute(
             db.select(Plugin).where(
                 or_(
@@ -70,18 +125,29 @@ def list_apis_using_plugin(plugin_identifier):
                 "message": "No plugin found with the provided identifier."
             }), 404
             
+        # Filters run against the deduplicated configs, then join to the APIs using them.
         apis = db.session.execute(
-            db.select(API)
+            db.select(*columns(API))
             .join(PluginAPIConfiguration, PluginAPIConfiguration.api_id == API.id)
-            .where(PluginAPIConfiguration.plugin_id == plugin.id)
-        ).scalars().all()
+            .join(PluginConfig, PluginConfig.hash == PluginAPIConfiguration.config_hash)
+            .where(
+                PluginAPIConfiguration.plugin_id == plugin.id,
+                *json_filters(PluginConfig.config, request.args, "config")
+            )
+        ).all()
         
-        apis_data = [api.to_dict() for api in apis]
+        apis_data = rows_to_dicts(apis)
 
-        return jsonify({
+        return tag(json_response({
             "plugin": plugin.name,
             "APIs": apis_data
-        }), 200
+        }), etag, weak=True), 200
+    
+    except ValueError as e:
+        return jsonify({
+            "error": "Invalid data.",
+            "message": str(e)
+        }), 400
 
     except Exception as e:
         return jsonify({
@@ -93,40 +159,54 @@ def list_apis_using_plugin(plugin_identifier):
         db.session.close()
         
         
+def _load_plugins_for_api(api_identifier):
+    """Return ``(api_id, plugins_data)`` for an API, from the read cache when possible."""
+    api_id = cached_api_id(api_identifier)
+    plugins_data = get_cached_api_plugins(api_id)
+    
+    if plugins_data is not None:
+        return api_id, plugins_data
+    
+    api = db.session.execute(
+        db.select(API)
+        .options(eager_plugins())
+        .where(
+            or_(    
+                API.id == api_identifier,
+                API.name == api_identifier
+            )
+        )
+    ).scalar()
+    
+    if api is None:
+        return None, None
+    
+    plugins_data = [plugin_config.to_dict() for plugin_config in api.plugins]
+    cache_api(api.to_dict())
+    cache_api_plugins(api.id, plugins_data)
+    return api.id, plugins_data
+        
+        
 @plugin.route("/apis/<api_identifier>/plugins")
 def list_plugins_for_api(api_identifier):
     try:
-        api = db.session.execute(
-            db.select(API).where(
-                or_(    
-                    API.id == api_identifier,
-                    API.name == api_identifier
-                )
-            )
-        ).scalar()
+        api_id, plugins_data = _load_plugins_for_api(api_identifier)
         
-        if api is None:
+        if api_id is None:
             return jsonify({
                 "error": "Not found.",
                 "message": "No API found with the provided identifier."
             }), 404
         
-        plugins_data = []
-        for plugin_config in api.plugins:
-            plugin_info = plugin_config.plugin.to_dict()
-            plugin_info.update({
-                "config": plugin_config.config,
-                "enabled": plugin_config.enabled,
-                "kong_plugin_id": plugin_config.kong_plugin_id,
-                "created_at": plugin_config.created_at,
-                "updated_at": plugin_config.updated_at
-            })
-            plugins_data.append(plugin_info)
+        etag = make_etag("api-plugins", api_id, plugins_data)
+        
+        if is_fresh(etag):
+            return not_modified(etag)
 
-        return jsonify({
-            "api_id": api.id,
+        return tag(jsonify({
+            "api_id": api_id,
             "plugins": plugins_data
-        }), 200
+        }), etag), 200
           
     except Exception as e:
         return jsonify({
@@ -141,52 +221,34 @@ def list_plugins_for_api(api_identifier):
 @plugin.route("/apis/<api_identifier>/plugins/<plugin_identifier>")
 def get_plugin_for_api(api_identifier, plugin_identifier):
     try:
-        api = api = db.session.execute(
-            db.select(API).where(
-                or_(    
-                    API.id == api_identifier,
-                    API.name == api_identifier
-                )
-            )
-        ).scalar()
+        api_id, plugins_data = _load_plugins_for_api(api_identifier)
         
-        if api is None:
+        if api_id is None:
             return jsonify({
                 "error": "Not found.",
                 "message": "No API found with the provided identifier."
             }), 404
-            
-        plugin_config = db.session.execute(
-            db.select(PluginAPIConfiguration)
-            .join(Plugin, Plugin.id == PluginAPIConfiguration.plugin_id)
-            .where(
-                PluginAPIConfiguration.api_id == api.id,
-                or_(
-                    Plugin.id == plugin_identifier,
-                    Plugin.name == plugin_identifier
-                )
-            )
-        ).scalar()
         
-        if plugin_config is None:
+        plugin_data = next((
+            plugin_data for plugin_data in plugins_data
+            if plugin_identifier in (plugin_data["id"], plugin_data["name"])
+        ), None)
+        
+        if plugin_data is None:
             return jsonify({
                 "error": "Not found.",
                 "message": "No plugin found with the provided identifier."
             }), 404
         
-        plugin_data = plugin_config.plugin.to_dict()
-        plugin_data.update({
-            "config": plugin_config.config,
-            "enabled": plugin_config.enabled,
-            "kong_plugin_id": plugin_config.kong_plugin_id,
-            "created_at": plugin_config.created_at,
-            "updated_at": plugin_config.updated_at
-        })
+        etag = make_etag("api-plugin", api_id, plugin_data)
         
-        return jsonify({
-            "api_id": api.id,
+        if is_fresh(etag):
+            return not_modified(etag)
+        
+        return tag(jsonify({
+            "api_id": api_id,
             "plugin": plugin_data
-        }), 200
+        }), etag), 200
         
     except Exception as e:
         return jsonify({
@@ -199,7 +261,9 @@ def get_plugin_for_api(api_identifier, plugin_identifier):
         
         
 @plugin.route("/apis/<api_identifier>/plugins", methods=["POST"])
-def create_plugin_for_api(api_identifier):
+@idempotent
+@respond_async(fields_validator("ALLOW_FIELDS_FOR_CREATE_PLUGIN", "name"))
+async def create_plugin_for_api(api_identifier):
     try:
         api = db.session.execute(
             db.select(API).where(
@@ -255,7 +319,7 @@ def create_plugin_for_api(api_identifier):
                 "message": f"The '{plugin_name}' plugin already exists for this API."
             }), 409
                 
-        config, kong_plugin_id, error = create_plugin_in_kong(api.kong_service_id, data)
+        config, kong_plugin_id, error = await create_plugin_in_kong(api.kong_service_id, data)
         
         if error:
             return jsonify({
@@ -272,14 +336,16 @@ def create_plugin_for_api(api_identifier):
             db.session.add(plugin)
 
         plugin_config = PluginAPIConfiguration(
-            config=config,
+            config_hash=store_config(config),
             kong_plugin_id=kong_plugin_id,
             plugin=plugin,
             api=api
         )
         
         db.session.add(plugin_config)
+        api_id = api.id
         db.session.commit()
+        invalidate_api_plugins(api_id)
         return jsonify({
             "message": "Plugin created successfully.",
             "plugin_id": plugin.id
@@ -303,7 +369,9 @@ def create_plugin_for_api(api_identifier):
         
         
 @plugin.route("/apis/<api_identifier>/plugins/<plugin_identifier>", methods=["PATCH"])
-def update_plugin_for_api(api_identifier, plugin_identifier):
+@idempotent
+@respond_async(fields_validator("ALLOW_FIELDS_FOR_UPDATE_PLUGIN"))
+async def update_plugin_for_api(api_identifier, plugin_identifier):
     try:
         api = db.session.execute(
             db.select(API).where(
@@ -322,6 +390,7 @@ def update_plugin_for_api(api_identifier, plugin_identifier):
             
         plugin_config_to_update = db.session.execute(
             db.select(PluginAPIConfiguration)
+            .options(joinedload(PluginAPIConfiguration.config_blob))
             .join(Plugin, Plugin.id == PluginAPIConfiguration.plugin_id)
             .where(
                 PluginAPIConfiguration.api_id == api.id,
@@ -353,19 +422,38 @@ def update_plugin_for_api(api_identifier, plugin_identifier):
                 "error": "schema violation",
                 "fields": unknown_fields
             }), 400
+        
+        if "config" in data and not isinstance(data["config"], dict):
+            return jsonify({
+                "error": "schema violation",
+                "fields": {"config": "must be an object"}
+            }), 400
+        
+        # Kong merges a partial config into the stored one, so compare the merged result.
+        config = merge_config(plugin_config_to_update.config, data["config"]) if "config" in data else plugin_config_to_update.config
+        new_config_hash = config_hash(config)
+        enabled = data.get("enabled", plugin_config_to_update.enabled)
+        
+        if new_config_hash == plugin_config_to_update.config_hash and enabled == plugin_config_to_update.enabled:
+            return jsonify({
+                "message": "Plugin updated successfully."
+            }), 200
                
-        status, error = update_plugin_in_kong(plugin_config_to_update.kong_plugin_id, data)
+        status, error = await update_plugin_in_kong(plugin_config_to_update.kong_plugin_id, data)
         
         if status == "failure":
             return jsonify({
                 "error": "Plugin update failed.",
                 "message": error
             }), 500
+        
+        if new_config_hash != plugin_config_to_update.config_hash:
+            plugin_config_to_update.config_hash = store_config(config)
+        plugin_config_to_update.enabled = enabled
             
-        for key, value in data.items():
-            setattr(plugin_config_to_update, key, value)
-            
+        api_id = api.id
         db.session.commit()
+        invalidate_api_plugins(api_id)
         return jsonify({
             "message": "Plugin updated successfully."
         }), 200
@@ -388,7 +476,9 @@ def update_plugin_for_api(api_identifier, plugin_identifier):
         
         
 @plugin.route("/apis/<api_identifier>/plugins/<plugin_identifier>", methods=["DELETE"])
-def delete_plugin_for_api(api_identifier, plugin_identifier):
+@idempotent
+@respond_async()
+async def delete_plugin_for_api(api_identifier, plugin_identifier):
     try:
         api = db.session.execute(
             db.select(API).where(
@@ -423,7 +513,7 @@ def delete_plugin_for_api(api_identifier, plugin_identifier):
                 "message": "No plugin found with the provided identifier."
             }), 404
                
-        status, error = delete_plugin_in_kong(plugin_config_to_delete.kong_plugin_id)
+        status, error = await delete_plugin_in_kong(plugin_config_to_delete.kong_plugin_id)
         
         if status == "failure":
             return jsonify({
@@ -432,7 +522,9 @@ def delete_plugin_for_api(api_identifier, plugin_identifier):
             }), 500
         
         db.session.delete(plugin_config_to_delete)
+        api_id = api.id
         db.session.commit()
+        invalidate_api_plugins(api_id)
         return jsonify({
             "message": "Plugin deleted successfully."
         }), 200
@@ -450,5 +542,242 @@ def delete_plugin_for_api(api_identifier, plugin_identifier):
             "message": str(e)
         }), 500
         
+    finally:
+        db.session.close()
+        
+        
+@plugin.route("/plugins/<plugin_identifier>/apis", methods=["POST"])
+@idempotent
+@respond_async(fanout_validator("ALLOW_FIELDS_FOR_CREATE_PLUGIN"))
+async def create_plugin_for_apis(plugin_identifier):
+    try:
+        data = request.get_json()
+        
+        if data is None:
+            raise ValueError("Invalid JSON data.")
+        
+        error_response = fanout_validator("ALLOW_FIELDS_FOR_CREATE_PLUGIN")(data)
+        
+        if error_response:
+            return error_response
+        
+        plugin_data = {key: value for key, value in data.items() if key != "selector"}
+        plugin_data["name"] = plugin_identifier
+        
+        plugin_id = db.session.execute(
+            db.select(Plugin.id).where(Plugin.name == plugin_identifier)
+        ).scalar()
+        
+        targets = load_targets(data["selector"], plugin_id)
+        results = [
+            _failure(target.id, 409, "Conflict.", f"The '{plugin_identifier}' plugin already exists for this API.")
+            for target in targets if target.kong_plugin_id
+        ]
+        targets = [target for target in targets if not target.kong_plugin_id]
+        # Hand the connection back to the pool while the Kong calls are in flight.
+        db.session.rollback()
+        
+        outcomes = await run_in_kong(
+            lambda kong, target: kong.create_plugin_in_kong(target.kong_service_id, plugin_data), targets
+        )
+        
+        created = []
+        for target, (config, kong_plugin_id, error) in outcomes:
+            if error:
+                results.append(_failure(target.id, 500, "Plugin creation failed.", error))
+            else:
+                created.append((target.id, config, kong_plugin_id))
+        
+        if created:
+            try:
+                plugin_id = insert_attachments(plugin_identifier, created)
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                await compensate_creations([kong_plugin_id for _, _, kong_plugin_id in created])
+                results.extend(_failure(api_id, 500, "Internal server error.", str(e)) for api_id, _, _ in created)
+                return summarize(results)
+            
+            invalidate([api_id for api_id, _, _ in created])
+            results.extend({"api_id": api_id, "status": 201, "plugin_id": plugin_id} for api_id, _, _ in created)
+        
+        return summarize(results)
+    
+    except ValueError as e:
+        return jsonify({
+            "error": "Invalid data.",
+            "message": str(e)
+        }), 400
+    
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({
+            "error": "Internal server error.",
+            "message": str(e)
+        }), 500
+        
+    finally:
+        db.session.close()
+        
+        
+def _attached_targets(plugin_identifier, selector):
+    """Return ``(plugin, attached_targets, results)``, reporting selected APIs without the plugin as 404s."""
+    plugin = db.session.execute(
+        db.select(Plugin).where(
+            or_(
+                Plugin.id == plugin_identifier,
+                Plugin.name == plugin_identifier
+            )
+        )
+    ).scalar()
+    
+    if plugin is None:
+        return None, [], []
+    
+    targets = load_targets(selector, plugin.id)
+    results = [
+        _failure(target.id, 404, "Not found.", f"The '{plugin.name}' plugin is not applied to this API.")
+        for target in targets if not target.kong_plugin_id
+    ]
+    return plugin, [target for target in targets if target.kong_plugin_id], results
+        
+        
+@plugin.route("/plugins/<plugin_identifier>/apis", methods=["PATCH"])
+@idempotent
+@respond_async(fanout_validator("ALLOW_FIELDS_FOR_UPDATE_PLUGIN"))
+async def update_plugin_for_apis(plugin_identifier):
+    try:
+        data = request.get_json()
+        
+        if data is None:
+            raise ValueError("Invalid JSON data.")
+        
+        error_response = fanout_validator("ALLOW_FIELDS_FOR_UPDATE_PLUGIN")(data)
+        
+        if error_response:
+            return error_response
+        
+        plugin_data = {key: value for key, value in data.items() if key != "selector"}
+        plugin, targets, results = _attached_targets(plugin_identifier, data["selector"])
+        
+        if plugin is None:
+            return jsonify({
+                "error": "Not found.",
+                "message": "No plugin found with the provided identifier."
+            }), 404
+        
+        changed, unchanged, configs = plan_updates(targets, plugin_data)
+        results.extend({"api_id": target.id, "status": 200} for target in unchanged)
+        plugin_id = plugin.id
+        db.session.rollback()
+        
+        outcomes = await run_in_kong(
+            lambda kong, change: kong.update_plugin_in_kong(change[0].kong_plugin_id, plugin_data), changed
+        )
+        
+        updated = []
+        for (target, values), (status, error) in outcomes:
+            if status == "failure":
+                results.append(_failure(target.id, 500, "Plugin update failed.", error))
+            else:
+                updated.append((target.id, values))
+        
+        if updated:
+            try:
+                update_attachments(plugin_id, updated, configs)
+                db.session.commit()
+            except Exception as e:
+                # Kong already carries the new configuration; the drift report will show these APIs.
+                db.session.rollback()
+                results.extend(_failure(api_id, 500, "Internal server error.", str(e)) for api_id, _ in updated)
+                return summarize(results)
+            
+            invalidate([api_id for api_id, _ in updated])
+        
+        results.extend({"api_id": api_id, "status": 200} for api_id, _ in updated)
+        return summarize(results)
+    
+    except ValueError as e:
+        return jsonify({
+            "error": "Invalid data.",
+            "message": str(e)
+        }), 400
+    
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({
+            "error": "Internal server error.",
+            "message": str(e)
+        }), 500
+        
+    finally:
+        db.session.close()
+        
+        
+@plugin.route("/plugins/<plugin_identifier>/apis", methods=["DELETE"])
+@idempotent
+@respond_async(fanout_validator())
+async def delete_plugin_for_apis(plugin_identifier):
+    try:
+        data = request.get_json(silent=True)
+        
+        if data is None:
+            raise ValueError("Invalid JSON data.")
+        
+        error_response = fanout_validator()(data)
+        
+        if error_response:
+            return error_response
+        
+        plugin, targets, results = _attached_targets(plugin_identifier, data["selector"])
+        
+        if plugin is None:
+            return jsonify({
+                "error": "Not found.",
+                "message": "No plugin found with the provided identifier."
+            }), 404
+        
+        plugin_id = plugin.id
+        db.session.rollback()
+        
+        outcomes = await run_in_kong(
+            lambda kong, target: kong.delete_plugin_in_kong(target.kong_plugin_id), targets
+        )
+        
+        deleted = []
+        for target, (status, error) in outcomes:
+            if status == "failure":
+                results.append(_failure(target.id, 500, "Plugin deletion failed.", error))
+            else:
+                deleted.append(target.id)
+        
+        if deleted:
+            try:
+                delete_attachments(plugin_id, deleted)
+                db.session.commit()
+            except Exception as e:
+                # The plugins are already gone from Kong; the drift report will show these APIs.
+                db.session.rollback()
+                results.extend(_failure(api_id, 500, "Internal server error.", str(e)) for api_id in deleted)
+                return summarize(results)
+            
+            invalidate(deleted)
+        
+        results.extend({"api_id": api_id, "status": 200} for api_id in deleted)
+        return summarize(results)
+    
+    except ValueError as e:
+        return jsonify({
+            "error": "Invalid data.",
+            "message": str(e)
+        }), 400
+    
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({
+            "error": "Internal server error.",
+            "message": str(e)
+        }), 500
+        
     finally:
         db.session.close()
\ No newline at end of file
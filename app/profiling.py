@@ -0,0 +1,179 @@
+import cProfile
+import functools
+import inspect
+import json
+import logging
+import os
+import random
+import threading
+import time
+import uuid
+
+import click
+from flask import request, g, has_request_context
+from itsdangerous import BadSignature, TimestampSigner
+
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+KINDS = ("sql", "kong", "serialize")
+
+# cProfile can only have one active profiler per thread (per interpreter from
+# Python 3.12 on), so at most one sampled request per process is profiled.
+_sampling_lock = threading.Lock()
+
+
+def record(kind, elapsed):
+    """Add one ``kind`` call taking ``elapsed`` seconds to the current request's profile, if any."""
+    if has_request_context():
+        profile = g.get("profile")
+        if profile is not None:
+            profile[kind][0] += 1
+            profile[kind][1] += elapsed
+
+
+def _signer(app):
+    return TimestampSigner(app.config["SECRET_KEY"], salt="profiling")
+
+
+def _requested(app):
+    if app.config["PROFILING_ENABLED"]:
+        return True
+    token = request.headers.get("X-Profile-Token")
+    if not token:
+        return False
+    try:
+        _signer(app).unsign(token, max_age=app.config["PROFILING_TOKEN_MAX_AGE"])
+        return True
+    except BadSignature:
+        return False
+
+
+def server_timing(profile, total):
+    entries = [
+        f'{kind};dur={seconds * 1000:.1f};desc="{count} calls"'
+        for kind, (count, seconds) in profile.items()
+    ]
+    entries.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(entries)
+
+
+def _keep_if_slowest(app, profiler, duration):
+    """Store ``profiler`` under ``PROFILING_DIR`` if it is among the ``PROFILING_KEEP_SLOWEST`` slowest."""
+    directory = app.config["PROFILING_DIR"]
+    keep = app.config["PROFILING_KEEP_SLOWEST"]
+    os.makedirs(directory, exist_ok=True)
+
+    # Names start with the zero-padded duration, so sorting them sorts by duration.
+    stored = sorted(name for name in os.listdir(directory) if name.endswith(".prof"))
+    name = f"{int(duration * 1000):09d}-{request.endpoint}-{uuid.uuid4().hex[:8]}.prof"
+
+    if len(stored) >= keep and name < stored[0]:
+        return
+
+    profiler.dump_stats(os.path.join(directory, name))
+
+    for evicted in sorted(stored + [name])[:-keep]:
+        try:
+            os.remove(os.path.join(directory, evicted))
+        except FileNotFoundError:
+            pass
+
+
+def list_profiles(app):
+    directory = app.config["PROFILING_DIR"]
+    if not os.path.isdir(directory):
+        return []
+    return [
+        {
+            "name": name,
+            "duration_ms": int(name.split("-", 1)[0]),
+            "endpoint": name.split("-", 1)[1].rsplit("-", 1)[0]
+        }
+        for name in sorted(os.listdir(directory), reverse=True) if name.endswith(".prof")
+    ]
+
+
+def _profile_coroutine(view):
+    # Async views run on an event loop in another thread, so the sampled
+    # profiler has to be switched on there rather than in the request thread.
+    @functools.wraps(view)
+    async def wrapper(*args, **kwargs):
+        profiler = g.get("profiler")
+        if profiler is None:
+            return await view(*args, **kwargs)
+        profiler.enable()
+        try:
+            return await view(*args, **kwargs)
+        finally:
+            profiler.disable()
+
+    return wrapper
+
+
+def init_profiling(app):
+    """Opt-in per-request profiling.
+
+    Requests are profiled when ``PROFILING_ENABLED`` is set or they carry a
+    valid ``X-Profile-Token`` (see ``flask profiling-token``). Their SQL, Kong
+    and serialization counts and times are returned in ``Server-Timing`` and
+    logged as one JSON line. Independently, ``PROFILING_SAMPLE_RATE`` of all
+    requests run under cProfile and the slowest ``PROFILING_KEEP_SLOWEST``
+    are kept under ``PROFILING_DIR`` for download from ``/admin/profiles``.
+    Must be called after every blueprint is registered.
+    """
+    for endpoint, view in app.view_functions.items():
+        if inspect.iscoroutinefunction(view):
+            app.view_functions[endpoint] = _profile_coroutine(view)
+
+    @app.before_request
+    def start_profile():
+        g.profile_started = time.perf_counter()
+        if _requested(app):
+            g.profile = {kind: [0, 0.0] for kind in KINDS}
+
+        if random.random() < app.config["PROFILING_SAMPLE_RATE"] and _sampling_lock.acquire(blocking=False):
+            g.profiler = cProfile.Profile()
+            if not inspect.iscoroutinefunction(app.view_functions.get(request.endpoint)):
+                g.profiler.enable()
+
+    @app.after_request
+    def finish_profile(response):
+        total = time.perf_counter() - g.pop("profile_started", time.perf_counter())
+        profile = g.get("profile")
+
+        if profile is not None:
+            response.headers["Server-Timing"] = server_timing(profile, total)
+            logger.info(json.dumps({
+                "event": "request_profile",
+                "endpoint": request.endpoint,
+                "method": request.method,
+                "status": response.status_code,
+                "duration_ms": round(total * 1000, 1),
+                **{f"{kind}_calls": count for kind, (count, _) in profile.items()},
+                **{f"{kind}_ms": round(seconds * 1000, 1) for kind, (_, seconds) in profile.items()}
+            }))
+
+        profiler = g.get("profiler")
+        if profiler is not None:
+            try:
+                profiler.disable()
+                _keep_if_slowest(app, profiler, total)
+            except Exception as e:
+                logger.error(f"Failed to store request profile: {e}")
+
+        return response
+
+    @app.teardown_request
+    def release_profiler(exc):
+        # after_request is skipped on unhandled errors, teardown is not.
+        profiler = g.pop("profiler", None)
+        if profiler is not None:
+            profiler.disable()
+            _sampling_lock.release()
+
+    @app.cli.command("profiling-token")
+    def profiling_token():
+        """Print a token enabling profiling through the X-Profile-Token header."""
+        click.echo(_signer(app).sign("profile").decode())
\ No newline at end of file
@@ -0,0 +1,45 @@
+from functools import lru_cache
+import json
+import time
+
+from flask import Response
+from sqlalchemy.inspection import inspect
+
+from app import profiling
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+@lru_cache(maxsize=None)
+def column_keys(model):
+    """Column attribute keys of ``model``, computed once per mapped class."""
+    return tuple(column.key for column in inspect(model).column_attrs)
+
+
+def model_to_dict(instance):
+    return {key: getattr(instance, key) for key in column_keys(type(instance))}
+
+
+def columns(model):
+    """Select list for reading ``model`` as plain Core rows, skipping ORM object construction."""
+    return [prop.columns[0].label(prop.key) for prop in inspect(model).column_attrs]
+
+
+def rows_to_dicts(rows):
+    return [row._asdict() for row in rows]
+
+
+def dumps(payload):
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload, separators=(",", ":"))
+
+
+def json_response(payload, status=200):
+    started = time.perf_counter()
+    body = dumps(payload)
+    profiling.record("serialize", time.perf_counter() - started)
+    return Response(body, status=status, mimetype="application/json")
\ No newline at end of file
@@ -0,0 +1,5 @@
+from flask import Blueprint
+
+state = Blueprint("state", __name__)
+
+from app.state import routes
\ No newline at end of file
@@ -0,0 +1,426 @@
+import asyncio
+import logging
+import uuid
+
+from flask import current_app as app
+from sqlalchemy.orm import joinedload
+
+from app.extensions import db
+from app.models import API, Plugin, PluginAPIConfiguration
+from app.cache import invalidate_api
+from app.plugin.configs import merge_config, store_config
+from app.kong_client.async_client import get_async_kong_client
+from app.async_tasks import rollback_for_api_creation_failure, rollback_for_api_delete_failure
+
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+SERVICE_FIELDS = ("url", "enabled")
+ROUTE_FIELDS = ("path", "headers", "methods")
+ALLOW_FIELDS_FOR_PLUGIN_STATE = {"name", "config", "enabled"}
+
+
+def load_desired_state(document):
+    """Validate a desired-state document and return its APIs keyed by name."""
+    if not isinstance(document, dict) or not isinstance(document.get("apis"), list):
+        raise ValueError("The state document must be an object with an 'apis' list.")
+
+    allowed_fields = app.config["ALLOW_FIELDS_FOR_UPDATE_API"] | {"plugins"}
+    desired = {}
+    seen = {"url": set(), "path": set()}
+
+    for entry in document["apis"]:
+        if not isinstance(entry, dict):
+            raise ValueError("Each API in the state document must be an object.")
+
+        missing_fields = [field for field in ["name", "url", "path"] if not entry.get(field)]
+        if missing_fields:
+            raise ValueError(f"The following required fields are missing: {', '.join(missing_fields)}.")
+
+        unknown_fields = [field for field in entry.keys() if field not in allowed_fields]
+        if unknown_fields:
+            raise ValueError(f"Unknown fields on API '{entry['name']}': {', '.join(unknown_fields)}.")
+
+        if entry["name"] in desired:
+            raise ValueError(f"API '{entry['name']}' is declared more than once.")
+
+        for field in seen:
+            if entry[field] in seen[field]:
+                raise ValueError(f"The {field} '{entry[field]}' is declared by more than one API.")
+            seen[field].add(entry[field])
+
+        plugins = {}
+        for plugin in entry.get("plugins") or []:
+            if not isinstance(plugin, dict) or not plugin.get("name"):
+                raise ValueError(f"Each plugin of API '{entry['name']}' must be an object with a 'name'.")
+
+            unknown_fields = [field for field in plugin.keys() if field not in ALLOW_FIELDS_FOR_PLUGIN_STATE]
+            if unknown_fields:
+                raise ValueError(f"Unknown fields on plugin '{plugin['name']}': {', '.join(unknown_fields)}.")
+
+            if plugin["name"] in plugins:
+                raise ValueError(f"Plugin '{plugin['name']}' is declared more than once on API '{entry['name']}'.")
+
+            plugins[plugin["name"]] = {
+                "config": plugin.get("config") or {},
+                "enabled": plugin.get("enabled", True)
+            }
+
+        desired[entry["name"]] = {
+            "url": entry["url"],
+            "path": entry["path"],
+            "headers": entry.get("headers") or None,
+            "methods": entry.get("methods") or None,
+            "enabled": entry.get("enabled", True),
+            "plugins": plugins
+        }
+
+    return desired
+
+
+def load_current_state():
+    """Load every API with its plugin configurations in a single joined SELECT."""
+    return db.session.execute(
+        db.select(API).options(
+            joinedload(API.plugins).options(
+                joinedload(PluginAPIConfiguration.plugin),
+                joinedload(PluginAPIConfiguration.config_blob)
+            )
+        )
+    ).unique().scalars().all()
+
+
+def is_subset(desired, current):
+    """Kong stores fully expanded plugin configs, so a declared config only has to be contained in it."""
+    if isinstance(desired, dict):
+        return isinstance(current, dict) and all(
+            key in current and is_subset(value, current[key])
+            for key, value in desired.items()
+        )
+    return desired == current
+
+
+def _plan_plugins(api, desired_plugins):
+    current = {plugin_config.plugin.name: plugin_config for plugin_config in (api.plugins if api else [])}
+
+    create = {name: spec for name, spec in desired_plugins.items() if name not in current}
+    update = {
+        name: spec for name, spec in desired_plugins.items()
+        if name in current and (
+            not is_subset(spec["config"], current[name].config)
+            or spec["enabled"] != current[name].enabled
+        )
+    }
+    delete = [plugin_config for name, plugin_config in current.items() if name not in desired_plugins]
+
+    return {
+        "create": create,
+        "update": {name: (current[name], spec) for name, spec in update.items()},
+        "delete": delete
+    }
+
+
+def plan_changes(desired, current_apis, prune=True):
+    """Diff the desired state against the database and return the changes needed to converge."""
+    changes = []
+    current_by_name = {api.name: api for api in current_apis if api.name}
+
+    for name, spec in desired.items():
+        api = current_by_name.get(name)
+
+        if api is None:
+            changes.append({
+                "name": name,
+                "action": "create",
+                "api": None,
+                "desired": spec,
+                "service": {"name": name, "url": spec["url"], **({} if spec["enabled"] else {"enabled": False})},
+                "route": {
+                    "paths": [spec["path"]],
+                    **({"headers": spec["headers"]} if spec["headers"] else {}),
+                    **({"methods": spec["methods"]} if spec["methods"] else {})
+                },
+                "plugins": _plan_plugins(None, spec["plugins"])
+            })
+            continue
+
+        service = {field: spec[field] for field in SERVICE_FIELDS if getattr(api, field) != spec[field]}
+        route = {
+            ("paths" if field == "path" else field): ([spec[field]] if field == "path" else spec[field])
+            for field in ROUTE_FIELDS
+            if (getattr(api, field) or None) != spec[field]
+        }
+        plugins = _plan_plugins(api, spec["plugins"])
+
+        if service or route or any(plugins.values()):
+            changes.append({
+                "name": name,
+                "action": "update",
+                "api": api,
+                "desired": spec,
+                "service": service,
+                "route": route,
+                "plugins": plugins
+            })
+
+    if prune:
+        for api in current_apis:
+            if api.name not in desired:
+                changes.append({
+                    "name": api.name or api.id,
+                    "action": "delete",
+                    "api": api
+                })
+
+    _check_unique(desired, current_apis, prune)
+    return changes
+
+
+def _check_unique(desired, current_apis, prune):
+    """Reject a desired url or path still held by an API the apply keeps, before anything reaches Kong."""
+    if prune:
+        return
+
+    for api in current_apis:
+        if api.name in desired:
+            continue
+        for field in ("url", "path"):
+            holder = next((name for name, spec in desired.items() if spec[field] == getattr(api, field)), None)
+            if holder:
+                raise ValueError(
+                    f"The {field} '{getattr(api, field)}' of API '{holder}' is already used by API "
+                    f"'{api.name or api.id}', which is kept because prune is disabled."
+                )
+
+
+def describe(change):
+    summary = {"api": change["name"], "action": change["action"]}
+
+    if change["action"] != "delete":
+        summary.update({
+            "service": sorted(change["service"]),
+            "route": sorted(change["route"]),
+            "plugins": {
+                "create": sorted(change["plugins"]["create"]),
+                "update": sorted(change["plugins"]["update"]),
+                "delete": sorted(plugin_config.plugin.name for plugin_config in change["plugins"]["delete"])
+            }
+        })
+
+    if change.get("errors"):
+        summary["errors"] = change["errors"]
+
+    return summary
+
+
+async def _converge_plugins(kong, kong_service_id, plugins, change):
+    names = list(plugins["create"]) + list(plugins["update"]) + [plugin_config.plugin.name for plugin_config in plugins["delete"]]
+    results = await asyncio.gather(
+        *(kong.create_plugin_in_kong(kong_service_id, {"name": name, **spec}) for name, spec in plugins["create"].items()),
+        *(kong.update_plugin_in_kong(plugin_config.kong_plugin_id, spec) for plugin_config, spec in plugins["update"].values()),
+        *(kong.delete_plugin_in_kong(plugin_config.kong_plugin_id) for plugin_config in plugins["delete"])
+    )
+
+    change["plugin_results"] = dict(zip(names, results))
+    for name, result in change["plugin_results"].items():
+        if result[-1] is not None and result[0] != "success":
+            change["errors"].append({"plugin": name, "message": result[-1]})
+
+
+async def _converge_create(kong, change):
+    kong_service_id, service_error = await kong.create_service_in_kong(change["service"])
+
+    if service_error:
+        change["errors"].append({"service": service_error})
+        return
+
+    (kong_route_id, route_error), _ = await asyncio.gather(
+        kong.create_route_in_kong(kong_service_id, change["route"]),
+        _converge_plugins(kong, kong_service_id, change["plugins"], change)
+    )
+
+    if route_error:
+        # Kong removes a service's plugins along with the service itself.
+        rollback_for_api_creation_failure.delay(kong_service_id)
+        change["errors"].append({"route": route_error})
+        return
+
+    change["kong_service_id"] = kong_service_id
+    change["kong_route_id"] = kong_route_id
+
+
+async def _converge_update(kong, change):
+    api = change["api"]
+
+    async def service():
+        if change["service"]:
+            change["service_status"], error = await kong.update_service_in_kong(api.kong_service_id, change["service"])
+            if error:
+                change["errors"].append({"service": error})
+
+    async def route():
+        if change["route"]:
+            change["route_status"], error = await kong.update_route_in_kong(api.kong_route_id, change["route"])
+            if error:
+                change["errors"].append({"route": error})
+
+    await asyncio.gather(service(), route(), _converge_plugins(kong, api.kong_service_id, change["plugins"], change))
+
+
+async def _converge_delete(kong, change):
+    api = change["api"]
+    route_status, route_error = await kong.delete_route_in_kong(api.kong_route_id)
+
+    if route_status == "failure":
+        change["errors"].append({"route": route_error})
+        return
+
+    service_status, service_error = await kong.delete_service_in_kong(api.kong_service_id)
+
+    if service_status == "failure":
+        rollback_for_api_delete_failure.delay(api.kong_service_id, api.id, {
+            "paths": [api.path],
+            "headers": api.headers,
+            "methods": api.methods
+        })
+        change["errors"].append({"service": service_error})
+        return
+
+    change["deleted"] = True
+
+
+async def execute_changes(changes):
+    """Run the Kong calls for every change.
+
+    Changes to different APIs are independent and run concurrently (bounded
+    by ``STATE_KONG_CONCURRENCY``). Within one API, a new service is created
+    before its route and plugins, and a route is deleted before its service.
+    """
+    kong = get_async_kong_client()
+    converge = {"create": _converge_create, "update": _converge_update, "delete": _converge_delete}
+
+    for change in changes:
+        change["errors"] = []
+
+    await kong.gather(
+        [converge[change["action"]](kong, change) for change in changes],
+        limit=app.config["STATE_KONG_CONCURRENCY"]
+    )
+
+
+def _apply_plugins(api, change, plugins_by_name):
+    results = change.get("plugin_results", {})
+
+    for name, spec in change["plugins"]["create"].items():
+        config, kong_plugin_id, error = results[name]
+        if error is None:
+            plugin = plugins_by_name.get(name)
+            if plugin is None:
+                plugin = plugins_by_name[name] = Plugin(name=name)
+                db.session.add(plugin)
+            db.session.add(PluginAPIConfiguration(
+                config_hash=store_config(config),
+                enabled=spec["enabled"],
+                kong_plugin_id=kong_plugin_id,
+                plugin=plugin,
+                api=api
+            ))
+
+    for name, (plugin_config, spec) in change["plugins"]["update"].items():
+        if results[name][0] == "success":
+            plugin_config.config_hash = store_config(merge_config(plugin_config.config, spec["config"]))
+            plugin_config.enabled = spec["enabled"]
+
+    for plugin_config in change["plugins"]["delete"]:
+        if results[plugin_config.plugin.name][0] == "success":
+            db.session.delete(plugin_config)
+
+
+def apply_changes(changes):
+    """Persist whatever Kong accepted, so the database keeps mirroring Kong even on partial failure.
+
+    Returns None once committed. If the database rejects the changes, the
+    services created in Kong are rolled back, every change is annotated with
+    what is left in Kong and the error message is returned.
+    """
+    stale = [(change["api"].id, change["api"].name) for change in changes if change["action"] != "create"]
+
+    try:
+        _persist(changes)
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Failed to record applied state, Kong and the database now differ: {e}")
+        _compensate(changes, str(e))
+        return str(e)
+
+    for api_id, name in stale:
+        invalidate_api(api_id, name)
+
+
+def _compensate(changes, error):
+    for change in changes:
+        if change["action"] == "create" and "kong_service_id" in change:
+            # Kong removes a service's plugins along with the service itself.
+            rollback_for_api_creation_failure.delay(change["kong_service_id"], change["kong_route_id"])
+            change["errors"].append({"database": error, "kong": "rollback scheduled"})
+        elif change["action"] == "delete" and change.get("deleted"):
+            change["errors"].append({"database": error, "kong": "deleted, see /admin/drift"})
+        elif change["action"] == "update" and (
+            change.get("service_status") == "success"
+            or change.get("route_status") == "success"
+            or any(result[0] == "success" or result[-1] is None for result in change.get("plugin_results", {}).values())
+        ):
+            change["errors"].append({"database": error, "kong": "updated, see /admin/drift"})
+
+
+def _persist(changes):
+    for change in changes:
+        if change["action"] == "delete" and change.get("deleted"):
+            db.session.delete(change["api"])
+
+    # Flush deletes first so a new API may reuse a url or path freed in the same apply.
+    db.session.flush()
+
+    plugin_names = {
+        name for change in changes if change["action"] == "create" or change["action"] == "update"
+        for name in change["plugins"]["create"]
+    }
+    plugins_by_name = {}
+    if plugin_names:
+        plugins_by_name = {
+            plugin.name: plugin for plugin in db.session.execute(
+                db.select(Plugin).where(Plugin.name.in_(plugin_names))
+            ).scalars()
+        }
+
+    for change in changes:
+        if change["action"] == "create" and "kong_service_id" in change:
+            spec = change["desired"]
+            api = API(
+                id=str(uuid.uuid4()),
+                name=change["name"],
+                url=spec["url"],
+                path=spec["path"],
+                headers=spec["headers"],
+                methods=spec["methods"],
+                enabled=spec["enabled"],
+                kong_service_id=change["kong_service_id"],
+                kong_route_id=change["kong_route_id"]
+            )
+            db.session.add(api)
+            _apply_plugins(api, change, plugins_by_name)
+
+        elif change["action"] == "update":
+            api = change["api"]
+            if change.get("service_status") == "success":
+                for key, value in change["service"].items():
+                    setattr(api, key, value)
+            if change.get("route_status") == "success":
+                for field in ROUTE_FIELDS:
+                    key = "paths" if field == "path" else field
+                    if key in change["route"]:
+                        setattr(api, field, change["desired"][field])
+            _apply_plugins(api, change, plugins_by_name)
+
+    db.session.commit()
@@ -0,0 +1,77 @@
+from flask import request, jsonify
+import yaml
+
+from app.extensions import db
+from app.state import state
+from app.state.reconcile import (
+    load_desired_state, load_current_state, plan_changes,
+    execute_changes, apply_changes, describe
+)
+
+
+def _parse_state_document():
+    if "yaml" in (request.mimetype or ""):
+        try:
+            return yaml.safe_load(request.get_data(as_text=True))
+        except yaml.YAMLError as e:
+            raise ValueError(f"Invalid YAML data: {e}")
+        
+    data = request.get_json(silent=True)
+    
+    if data is None:
+        raise ValueError("Invalid JSON data.")
+    
+    return data
+
+
+@state.route("/state", methods=["PUT"])
+async def apply_state():
+    try:
+        desired = load_desired_state(_parse_state_document())
+        prune = request.args.get("prune", "true").lower() != "false"
+        dry_run = request.args.get("dry_run", "false").lower() == "true"
+        
+        changes = plan_changes(desired, load_current_state(), prune=prune)
+        
+        if not changes or dry_run:
+            return jsonify({
+                "message": "No changes." if not changes else "Dry run, nothing applied.",
+                "changes": [describe(change) for change in changes]
+            }), 200
+            
+        await execute_changes(changes)
+        summaries = [describe(change) for change in changes]
+        error = apply_changes(changes)
+        
+        if error:
+            # The rows were rolled back; report what was left in Kong per change.
+            for summary, change in zip(summaries, changes):
+                if change["errors"]:
+                    summary["errors"] = change["errors"]
+            return jsonify({
+                "error": "State not recorded.",
+                "message": error,
+                "changes": summaries
+            }), 500
+        
+        failed = any(change["errors"] for change in changes)
+        return jsonify({
+            "message": "State partially applied." if failed else "State applied successfully.",
+            "changes": summaries
+        }), 207 if failed else 200
+        
+    except ValueError as e:
+        return jsonify({
+            "error": "Invalid data.",
+            "message": str(e)
+        }), 400
+    
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({
+            "error": "Internal server error.",
+            "message": str(e)
+        }), 500
+        
+    finally:
+        db.session.close()
\ No newline at end of file
@@ -0,0 +1,232 @@
+"""Throughput benchmark of the API and plugin endpoints against a fake Kong.
+
+Starts ``fake_kong`` in-process, builds the app against it and drives each
+operation through the Flask test client from ``--concurrency`` threads:
+
+    create_api, get_api, list_apis, update_api, create_plugin, list_plugins,
+    list_plugins_for_api, update_plugin, delete_plugin, delete_api
+
+For every operation it reports p50/p95/p99 latency, requests per second,
+errors, and the mean SQL statement and Kong call counts read back from the
+``Server-Timing`` header of the request profiler. Results are written as
+JSON; pass an earlier file as ``--baseline`` to print the change per metric.
+Needs a Postgres database the benchmark may write to (rows it creates are
+deleted again) and, when ``--error-rate`` is above zero, a Celery broker
+for the rollback tasks:
+
+    python benchmarks/api_load.py --database-url postgresql://localhost/kong_bench \\
+        --apis 500 --concurrency 16 --latency 20 --jitter 5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_kong import start_fake_kong
+
+from app import create_app
+from app.extensions import db
+from config import Config
+
+
+PLUGIN_NAME = "rate-limiting"
+
+
+def parse_server_timing(header):
+    """Return ``{"sql": calls, "kong": calls, ...}`` from a profiler ``Server-Timing`` header."""
+    calls = {}
+    for entry in (header or "").split(","):
+        fields = [field.strip() for field in entry.split(";")]
+        for field in fields[1:]:
+            if field.startswith("desc="):
+                calls[fields[0]] = int(field[len('desc="'):].split()[0])
+    return calls
+
+
+def percentile(samples, percent):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(percent / 100 * (len(ordered) - 1))))]
+
+
+class Runner:
+    def __init__(self, app, concurrency):
+        self.app = app
+        self.concurrency = concurrency
+        self.local = threading.local()
+
+    @property
+    def client(self):
+        if not hasattr(self.local, "client"):
+            self.local.client = self.app.test_client()
+        return self.local.client
+
+    def call(self, method, path, body=None):
+        started = time.perf_counter()
+        response = self.client.open(path, method=method, **({"json": body} if body is not None else {}))
+        elapsed = time.perf_counter() - started
+        return response, elapsed
+
+    def phase(self, name, requests):
+        """Run ``requests`` (callables returning ``(response, elapsed)``) and summarise them."""
+        if not requests:
+            print(f"{name:<22}skipped, nothing to run")
+            return {}, []
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            outcomes = list(executor.map(lambda request: request(), requests))
+        wall = time.perf_counter() - started
+
+        latencies = [elapsed for _, elapsed in outcomes]
+        timings = [parse_server_timing(response.headers.get("Server-Timing")) for response, _ in outcomes]
+        result = {
+            "requests": len(outcomes),
+            "errors": sum(1 for response, _ in outcomes if response.status_code >= 400),
+            "rps": len(outcomes) / wall if wall else None,
+            "p50_ms": percentile(latencies, 50) * 1000,
+            "p95_ms": percentile(latencies, 95) * 1000,
+            "p99_ms": percentile(latencies, 99) * 1000,
+            "sql_per_request": statistics.mean(timing.get("sql", 0) for timing in timings),
+            "kong_per_request": statistics.mean(timing.get("kong", 0) for timing in timings)
+        }
+        print(
+            f"{name:<22}{result['requests']:>7}{result['errors']:>7}{result['rps']:>9.1f}"
+            f"{result['p50_ms']:>9.1f}{result['p95_ms']:>9.1f}{result['p99_ms']:>9.1f}"
+            f"{result['sql_per_request']:>7.1f}{result['kong_per_request']:>7.1f}"
+        )
+        return result, [response for response, _ in outcomes]
+
+
+def run(app, args):
+    runner = Runner(app, args.concurrency)
+    run_id = uuid.uuid4().hex[:8]
+    results = {}
+
+    print(f"{'operation':<22}{'reqs':>7}{'errors':>7}{'rps':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'sql':>7}{'kong':>7}")
+
+    def request(method, path, body=None):
+        return lambda: runner.call(method, path, body)
+
+    names = [f"bench-{run_id}-{index}" for index in range(args.apis)]
+
+    results["create_api"], responses = runner.phase("create_api", [
+        request("POST", "/apis/", {"name": name, "url": f"http://{name}.internal:8080", "path": f"/{name}"})
+        for name in names
+    ])
+    names = [name for name, response in zip(names, responses) if response.status_code == 201]
+
+    results["get_api"], _ = runner.phase("get_api", [request("GET", f"/apis/{name}") for name in names])
+    results["list_apis"], _ = runner.phase("list_apis", [
+        request("GET", f"/apis/?limit={args.page_size}") for _ in range(args.list_requests)
+    ])
+    results["update_api"], _ = runner.phase("update_api", [
+        request("PATCH", f"/apis/{name}", {"path": f"/{name}-v2", "methods": ["GET", "POST"]}) for name in names
+    ])
+    results["create_plugin"], _ = runner.phase("create_plugin", [
+        request("POST", f"/apis/{name}/plugins", {"name": PLUGIN_NAME, "config": {"minute": 100}}) for name in names
+    ])
+    results["list_plugins"], _ = runner.phase("list_plugins", [
+        request("GET", f"/plugins?limit={args.page_size}") for _ in range(args.list_requests)
+    ])
+    results["list_plugins_for_api"], _ = runner.phase("list_plugins_for_api", [
+        request("GET", f"/apis/{name}/plugins") for name in names
+    ])
+    results["update_plugin"], _ = runner.phase("update_plugin", [
+        request("PATCH", f"/apis/{name}/plugins/{PLUGIN_NAME}", {"config": {"minute": 200}}) for name in names
+    ])
+    results["delete_plugin"], _ = runner.phase("delete_plugin", [
+        request("DELETE", f"/apis/{name}/plugins/{PLUGIN_NAME}") for name in names
+    ])
+    results["delete_api"], _ = runner.phase("delete_api", [request("DELETE", f"/apis/{name}") for name in names])
+
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline):
+    print(f"\nChange against {baseline['commit'] or 'baseline'} (negative latency and positive rps are better):")
+    for operation, metrics in results.items():
+        previous = baseline["results"].get(operation)
+        if not previous:
+            continue
+        changes = [
+            f"{metric} {(metrics[metric] - previous[metric]) / previous[metric] * 100:+.1f}%"
+            for metric in ("rps", "p50_ms", "p95_ms", "p99_ms")
+            if previous.get(metric)
+        ]
+        print(f"{operation:<22}{'  '.join(changes)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=Config.SQLALCHEMY_DATABASE_URI)
+    parser.add_argument("--apis", type=int, default=200, help="APIs created, updated and deleted")
+    parser.add_argument("--list-requests", type=int, default=200)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=10, help="fake Kong mean latency in milliseconds")
+    parser.add_argument("--jitter", type=float, default=2, help="fake Kong latency jitter in milliseconds")
+    parser.add_argument("--error-rate", type=float, default=0, help="fraction of fake Kong calls failing with a 500")
+    parser.add_argument("--output", help="result file (default: benchmarks/results/<commit>-<timestamp>.json)")
+    parser.add_argument("--baseline", help="earlier result file to compare against")
+    args = parser.parse_args()
+
+    server, kong_state, kong_url = start_fake_kong(
+        latency=args.latency / 1000, jitter=args.jitter / 1000, error_rate=args.error_rate
+    )
+
+    class BenchmarkConfig(Config):
+        SQLALCHEMY_DATABASE_URI = args.database_url
+        KONG_ADMIN_URL = kong_url
+        PROFILING_ENABLED = True
+        PROFILING_SAMPLE_RATE = 0
+
+    app = create_app(BenchmarkConfig)
+    with app.app_context():
+        db.create_all()
+
+    try:
+        results = run(app, args)
+    finally:
+        server.shutdown()
+
+    commit = git_commit()
+    report = {
+        "commit": commit,
+        "timestamp": int(time.time()),
+        "parameters": {key: value for key, value in vars(args).items() if key not in ("output", "baseline", "database_url")},
+        "kong_calls": dict(kong_state.calls),
+        "results": results
+    }
+
+    output = args.output or os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), "results", f"{commit or 'unknown'}-{report['timestamp']}.json"
+    )
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w") as file:
+        json.dump(report, file, indent=2)
+    print(f"\nSaved results to {output}")
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            compare(results, json.load(file))
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,180 @@
+"""In-process fake of the Kong Admin API for benchmarks.
+
+Implements the subset of ``/services``, ``/routes`` and ``/plugins`` the
+manager uses (create, patch, delete, paged listing), keeping entities in
+memory. Every request sleeps ``latency`` +/- ``jitter`` milliseconds first
+and fails with a 500 at ``error_rate``. Run it on its own with:
+
+    python benchmarks/fake_kong.py --port 8001 --latency 20 --jitter 5
+"""
+import argparse
+import json
+import random
+import threading
+import time
+import uuid
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+
+COLLECTIONS = ("services", "routes", "plugins")
+
+
+class FakeKongState:
+    def __init__(self, latency=0.0, jitter=0.0, error_rate=0.0):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.entities = {collection: {} for collection in COLLECTIONS}
+        self.calls = Counter()
+        self.lock = threading.Lock()
+
+    def delay(self):
+        seconds = max(0.0, self.latency + random.uniform(-self.jitter, self.jitter))
+        if seconds:
+            time.sleep(seconds)
+
+    def create(self, collection, data, service_id=None):
+        entity = {
+            "id": str(uuid.uuid4()),
+            "created_at": int(time.time()),
+            "updated_at": int(time.time()),
+            **({"enabled": True} if collection != "routes" else {}),
+            **data
+        }
+        if collection == "services" and "url" in entity:
+            parts = urlsplit(entity.pop("url"))
+            entity.update({
+                "protocol": parts.scheme,
+                "host": parts.hostname,
+                "port": parts.port or (443 if parts.scheme == "https" else 80),
+                "path": parts.path or None
+            })
+        if service_id:
+            entity["service"] = {"id": service_id}
+        with self.lock:
+            self.entities[collection][entity["id"]] = entity
+        return entity
+
+    def update(self, collection, entity_id, data):
+        with self.lock:
+            entity = self.entities[collection].get(entity_id)
+            if entity is None:
+                return None
+            entity.update(data, updated_at=int(time.time()))
+            return entity
+
+    def delete(self, collection, entity_id):
+        with self.lock:
+            self.entities[collection].pop(entity_id, None)
+
+    def page(self, collection, size, offset):
+        with self.lock:
+            entities = list(self.entities[collection].values())
+        start = int(offset or 0)
+        page = entities[start:start + size]
+        return {
+            "data": page,
+            "offset": str(start + size) if start + size < len(entities) else None
+        }
+
+
+def make_handler(state):
+    class FakeKongHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send(self, status, body=None):
+            payload = json.dumps(body).encode() if body is not None else b""
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def _body(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            return json.loads(self.rfile.read(length)) if length else {}
+
+        def _handle(self, method):
+            url = urlsplit(self.path)
+            parts = [part for part in url.path.split("/") if part]
+            body = self._body() if method in ("POST", "PATCH") else None
+            with state.lock:
+                state.calls[f"{method} {parts[0] if parts else ''}"] += 1
+            state.delay()
+
+            if random.random() < state.error_rate:
+                return self._send(500, {"message": "An unexpected error occurred"})
+
+            if not parts or parts[0] not in COLLECTIONS:
+                return self._send(404, {"message": "Not found"})
+
+            if method == "GET" and len(parts) == 1:
+                query = parse_qs(url.query)
+                size = int(query.get("size", ["100"])[0])
+                return self._send(200, state.page(parts[0], size, query.get("offset", [None])[0]))
+
+            if method == "POST" and len(parts) == 1:
+                return self._send(201, state.create(parts[0], body))
+
+            if method == "POST" and len(parts) == 3 and parts[0] == "services" and parts[2] in ("routes", "plugins"):
+                if parts[1] not in state.entities["services"]:
+                    return self._send(404, {"message": "Not found"})
+                return self._send(201, state.create(parts[2], body, service_id=parts[1]))
+
+            if method == "PATCH" and len(parts) == 2:
+                entity = state.update(parts[0], parts[1], body)
+                return self._send(200, entity) if entity else self._send(404, {"message": "Not found"})
+
+            if method == "DELETE" and len(parts) == 2:
+                state.delete(parts[0], parts[1])
+                return self._send(204)
+
+            return self._send(405, {"message": "Method not allowed"})
+
+        def do_GET(self):
+            self._handle("GET")
+
+        def do_POST(self):
+            self._handle("POST")
+
+        def do_PATCH(self):
+            self._handle("PATCH")
+
+        def do_DELETE(self):
+            self._handle("DELETE")
+
+    return FakeKongHandler
+
+
+def start_fake_kong(port=0, latency=0.0, jitter=0.0, error_rate=0.0):
+    """Serve a fake Kong Admin API from a daemon thread; return ``(server, state, base_url)``."""
+    state = FakeKongState(latency=latency, jitter=jitter, error_rate=error_rate)
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(state))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="fake-kong", daemon=True).start()
+    return server, state, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--latency", type=float, default=0, help="mean latency in milliseconds")
+    parser.add_argument("--jitter", type=float, default=0, help="latency jitter in milliseconds")
+    parser.add_argument("--error-rate", type=float, default=0, help="fraction of requests answered with a 500")
+    args = parser.parse_args()
+
+    server, _, base_url = start_fake_kong(args.port, args.latency / 1000, args.jitter / 1000, args.error_rate)
+    print(f"Fake Kong Admin API listening on {base_url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
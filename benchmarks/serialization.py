@@ -0,0 +1,112 @@
+"""Microbenchmark of list-endpoint serialization.
+
+Compares the original path (ORM objects, ``inspect()`` on every row, stdlib
+JSON) against ``app.serializers`` (Core rows, cached column keys, orjson when
+installed). Runs against in-memory SQLite with a copy of the ``api`` table, so
+no Postgres is needed:
+
+    python benchmarks/serialization.py --rows 10000 100000
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import uuid
+
+from sqlalchemy import create_engine, select, insert, String, Integer, Boolean, JSON
+from sqlalchemy.inspection import inspect
+from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, Session
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.serializers import columns, rows_to_dicts, dumps, orjson
+
+
+class Base(DeclarativeBase):
+    pass
+
+
+class API(Base):
+    __tablename__ = "api"
+
+    id: Mapped[str] = mapped_column(String(36), primary_key=True)
+    name: Mapped[str] = mapped_column(String(255))
+    url: Mapped[str] = mapped_column(String)
+    path: Mapped[str] = mapped_column(String)
+    headers: Mapped[dict] = mapped_column(JSON, nullable=True)
+    methods: Mapped[list] = mapped_column(JSON, nullable=True)
+    enabled: Mapped[bool] = mapped_column(Boolean)
+    kong_service_id: Mapped[str] = mapped_column(String(36))
+    kong_route_id: Mapped[str] = mapped_column(String(36))
+    created_at: Mapped[int] = mapped_column(Integer)
+    updated_at: Mapped[int] = mapped_column(Integer)
+
+    def to_dict(self) -> dict:
+        columns = [column.key for column in inspect(self).mapper.column_attrs]
+        return {column: getattr(self, column) for column in columns}
+
+
+def populate(engine, rows):
+    now = int(time.time())
+    Base.metadata.create_all(engine)
+    with engine.begin() as connection:
+        connection.execute(insert(API), [
+            {
+                "id": str(uuid.uuid4()),
+                "name": f"api-{index}",
+                "url": f"http://upstream-{index}.internal:8080",
+                "path": f"/api-{index}",
+                "headers": {"x-tenant": [f"tenant-{index % 50}"]},
+                "methods": ["GET", "POST"],
+                "enabled": True,
+                "kong_service_id": str(uuid.uuid4()),
+                "kong_route_id": str(uuid.uuid4()),
+                "created_at": now,
+                "updated_at": now
+            }
+            for index in range(rows)
+        ])
+
+
+def orm_path(engine):
+    with Session(engine) as session:
+        apis = session.execute(select(API)).scalars().all()
+        return json.dumps({"APIs": [api.to_dict() for api in apis]})
+
+
+def core_path(engine):
+    with engine.connect() as connection:
+        rows = connection.execute(select(*columns(API))).all()
+        return dumps({"APIs": rows_to_dicts(rows)})
+
+
+def measure(function, engine, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(engine)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"JSON encoder: {'orjson' if orjson is not None else 'json (orjson not installed)'}")
+    print(f"{'rows':>8}  {'orm + inspect':>14}  {'core + cached':>14}  {'speedup':>8}")
+
+    for rows in args.rows:
+        engine = create_engine("sqlite://")
+        populate(engine, rows)
+        orm = measure(orm_path, engine, args.repeat)
+        core = measure(core_path, engine, args.repeat)
+        print(f"{rows:>8}  {orm * 1000:>12.1f}ms  {core * 1000:>12.1f}ms  {orm / core:>7.1f}x")
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
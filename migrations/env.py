@@ -104,6 +104,12 @@ def run_migrations_online():
         )
 
         with context.begin_transaction():
+            # DB_STATEMENT_TIMEOUT_MS (or a role-level statement_timeout behind
+            # PgBouncer) is sized for API queries; index builds and table
+            # rewrites must not be cancelled by it. SET LOCAL ends with the
+            # migration transaction, so the pooled connection is left as it was.
+            if connection.dialect.name == "postgresql":
+                context.execute("SET LOCAL statement_timeout = 0")
             context.run_migrations()
 
 
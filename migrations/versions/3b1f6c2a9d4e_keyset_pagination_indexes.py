@@ -0,0 +1,44 @@
+"""Keyset pagination and list filter indexes.
+
+Revision ID: 3b1f6c2a9d4e
+Revises: 688fdea7f9f9
+Create Date: 2026-10-18 09:12:41.306518
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3b1f6c2a9d4e'
+down_revision = '688fdea7f9f9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('plugin', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('created_at', sa.Integer(), nullable=False, server_default=sa.text('extract(epoch from now())::integer')))
+        batch_op.add_column(sa.Column('updated_at', sa.Integer(), nullable=False, server_default=sa.text('extract(epoch from now())::integer')))
+        batch_op.alter_column('created_at', server_default=None)
+        batch_op.alter_column('updated_at', server_default=None)
+        batch_op.create_index('ix_plugin_created_at_id', ['created_at', 'id'], unique=False)
+
+    with op.batch_alter_table('api', schema=None) as batch_op:
+        batch_op.create_index('ix_api_created_at_id', ['created_at', 'id'], unique=False)
+        batch_op.create_index('ix_api_name_pattern', ['name'], unique=False, postgresql_ops={'name': 'varchar_pattern_ops'})
+        batch_op.create_index('ix_api_path_pattern', ['path'], unique=False, postgresql_ops={'path': 'varchar_pattern_ops'})
+        batch_op.create_index('ix_api_methods', ['methods'], unique=False, postgresql_using='gin')
+
+
+def downgrade():
+    with op.batch_alter_table('api', schema=None) as batch_op:
+        batch_op.drop_index('ix_api_methods', postgresql_using='gin')
+        batch_op.drop_index('ix_api_path_pattern', postgresql_ops={'path': 'varchar_pattern_ops'})
+        batch_op.drop_index('ix_api_name_pattern', postgresql_ops={'name': 'varchar_pattern_ops'})
+        batch_op.drop_index('ix_api_created_at_id')
+
+    with op.batch_alter_table('plugin', schema=None) as batch_op:
+        batch_op.drop_index('ix_plugin_created_at_id')
+        batch_op.drop_column('updated_at')
+        batch_op.drop_column('created_at')
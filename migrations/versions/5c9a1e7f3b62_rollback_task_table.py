@@ -0,0 +1,41 @@
+"""Track rollback task retries.
+
+Revision ID: 5c9a1e7f3b62
+Revises: 8e4d2b7c5a10
+Create Date: 2026-10-18 13:05:41.602317
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5c9a1e7f3b62'
+down_revision = '8e4d2b7c5a10'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('rollback_task',
+    sa.Column('id', sa.String(length=155), nullable=False),
+    sa.Column('name', sa.String(length=255), nullable=False),
+    sa.Column('args', sa.JSON(), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('last_error', sa.String(), nullable=True),
+    sa.Column('created_at', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('rollback_task', schema=None) as batch_op:
+        batch_op.create_index('ix_rollback_task_status_created_at_id', ['status', 'created_at', 'id'], unique=False)
+        batch_op.create_index('ix_rollback_task_created_at_id', ['created_at', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('rollback_task', schema=None) as batch_op:
+        batch_op.drop_index('ix_rollback_task_created_at_id')
+        batch_op.drop_index('ix_rollback_task_status_created_at_id')
+
+    op.drop_table('rollback_task')
\ No newline at end of file
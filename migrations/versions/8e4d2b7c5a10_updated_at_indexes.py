@@ -0,0 +1,37 @@
+"""Index updated_at for ETag validators.
+
+Revision ID: 8e4d2b7c5a10
+Revises: 3b1f6c2a9d4e
+Create Date: 2026-10-18 11:47:03.219854
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '8e4d2b7c5a10'
+down_revision = '3b1f6c2a9d4e'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('api', schema=None) as batch_op:
+        batch_op.create_index('ix_api_updated_at', ['updated_at'], unique=False)
+
+    with op.batch_alter_table('plugin', schema=None) as batch_op:
+        batch_op.create_index('ix_plugin_updated_at', ['updated_at'], unique=False)
+
+    with op.batch_alter_table('plugin_api_configuration', schema=None) as batch_op:
+        batch_op.create_index('ix_plugin_api_configuration_updated_at', ['updated_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('plugin_api_configuration', schema=None) as batch_op:
+        batch_op.drop_index('ix_plugin_api_configuration_updated_at')
+
+    with op.batch_alter_table('plugin', schema=None) as batch_op:
+        batch_op.drop_index('ix_plugin_updated_at')
+
+    with op.batch_alter_table('api', schema=None) as batch_op:
+        batch_op.drop_index('ix_api_updated_at')
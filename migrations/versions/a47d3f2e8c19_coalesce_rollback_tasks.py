@@ -0,0 +1,30 @@
+"""Coalesce rollback tasks per Kong entity.
+
+Revision ID: a47d3f2e8c19
+Revises: 5c9a1e7f3b62
+Create Date: 2026-10-18 13:41:18.275903
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a47d3f2e8c19'
+down_revision = '5c9a1e7f3b62'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('rollback_task', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('entity_key', sa.String(length=255), nullable=True))
+        batch_op.add_column(sa.Column('sequence', sa.BigInteger(), sa.Identity(), nullable=False))
+        batch_op.create_index('ix_rollback_task_entity_key_sequence', ['entity_key', 'sequence'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('rollback_task', schema=None) as batch_op:
+        batch_op.drop_index('ix_rollback_task_entity_key_sequence')
+        batch_op.drop_column('sequence')
+        batch_op.drop_column('entity_key')
\ No newline at end of file
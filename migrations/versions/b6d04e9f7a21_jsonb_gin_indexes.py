@@ -0,0 +1,37 @@
+"""Convert api.headers and plugin_config.config to JSONB with GIN indexes.
+
+Revision ID: b6d04e9f7a21
+Revises: f3a8c61d2b97
+Create Date: 2026-10-18 18:27:41.306592
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'b6d04e9f7a21'
+down_revision = 'f3a8c61d2b97'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('api', schema=None) as batch_op:
+        batch_op.alter_column('headers', existing_type=sa.JSON(), type_=postgresql.JSONB(astext_type=sa.Text()), existing_nullable=True, postgresql_using='headers::jsonb')
+        batch_op.create_index('ix_api_headers', ['headers'], unique=False, postgresql_using='gin')
+
+    with op.batch_alter_table('plugin_config', schema=None) as batch_op:
+        batch_op.alter_column('config', existing_type=sa.JSON(), type_=postgresql.JSONB(astext_type=sa.Text()), existing_nullable=False, postgresql_using='config::jsonb')
+        batch_op.create_index('ix_plugin_config_config', ['config'], unique=False, postgresql_using='gin', postgresql_ops={'config': 'jsonb_path_ops'})
+
+
+def downgrade():
+    with op.batch_alter_table('plugin_config', schema=None) as batch_op:
+        batch_op.drop_index('ix_plugin_config_config', postgresql_using='gin', postgresql_ops={'config': 'jsonb_path_ops'})
+        batch_op.alter_column('config', existing_type=postgresql.JSONB(astext_type=sa.Text()), type_=sa.JSON(), existing_nullable=False, postgresql_using='config::json')
+
+    with op.batch_alter_table('api', schema=None) as batch_op:
+        batch_op.drop_index('ix_api_headers', postgresql_using='gin')
+        batch_op.alter_column('headers', existing_type=postgresql.JSONB(astext_type=sa.Text()), type_=sa.JSON(), existing_nullable=True, postgresql_using='headers::json')
\ No newline at end of file
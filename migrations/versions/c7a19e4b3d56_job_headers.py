@@ -0,0 +1,28 @@
+"""Add headers to job.
+
+Revision ID: c7a19e4b3d56
+Revises: b6d04e9f7a21
+Create Date: 2026-10-18 19:36:10.582147
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c7a19e4b3d56'
+down_revision = 'b6d04e9f7a21'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('job', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('headers', sa.JSON(), nullable=True))
+        batch_op.create_index('ix_job_status_updated_at', ['status', 'updated_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('job', schema=None) as batch_op:
+        batch_op.drop_index('ix_job_status_updated_at')
+        batch_op.drop_column('headers')
\ No newline at end of file
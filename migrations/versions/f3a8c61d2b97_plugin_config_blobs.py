@@ -0,0 +1,94 @@
+"""Store plugin configs once in plugin_config, keyed by content hash.
+
+Revision ID: f3a8c61d2b97
+Revises: e91c57a3d8b4
+Create Date: 2026-10-18 17:42:05.913274
+
+"""
+import hashlib
+import json
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3a8c61d2b97'
+down_revision = 'e91c57a3d8b4'
+branch_labels = None
+depends_on = None
+
+
+plugin_config = sa.table('plugin_config',
+    sa.column('hash', sa.String),
+    sa.column('config', sa.JSON)
+)
+plugin_api_configuration = sa.table('plugin_api_configuration',
+    sa.column('plugin_id', sa.String),
+    sa.column('api_id', sa.String),
+    sa.column('config', sa.JSON),
+    sa.column('config_hash', sa.String)
+)
+
+
+def _config_hash(config):
+    # Must match app.plugin.configs.config_hash.
+    canonical = json.dumps(config, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def upgrade():
+    op.create_table('plugin_config',
+    sa.Column('hash', sa.String(length=64), nullable=False),
+    sa.Column('config', sa.JSON(), nullable=False),
+    sa.PrimaryKeyConstraint('hash')
+    )
+    with op.batch_alter_table('plugin_api_configuration', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('config_hash', sa.String(length=64), nullable=True))
+
+    connection = op.get_bind()
+    rows = connection.execute(
+        sa.select(plugin_api_configuration.c.plugin_id, plugin_api_configuration.c.api_id, plugin_api_configuration.c.config)
+    ).all()
+    hashes = {(row.plugin_id, row.api_id): _config_hash(row.config) for row in rows}
+    configs = {hashes[(row.plugin_id, row.api_id)]: row.config for row in rows}
+
+    if configs:
+        connection.execute(plugin_config.insert(), [{'hash': hash, 'config': config} for hash, config in configs.items()])
+        connection.execute(
+            plugin_api_configuration.update()
+            .where(
+                plugin_api_configuration.c.plugin_id == sa.bindparam('b_plugin_id'),
+                plugin_api_configuration.c.api_id == sa.bindparam('b_api_id')
+            )
+            .values(config_hash=sa.bindparam('b_config_hash')),
+            [
+                {'b_plugin_id': plugin_id, 'b_api_id': api_id, 'b_config_hash': hash}
+                for (plugin_id, api_id), hash in hashes.items()
+            ]
+        )
+
+    with op.batch_alter_table('plugin_api_configuration', schema=None) as batch_op:
+        batch_op.alter_column('config_hash', existing_type=sa.String(length=64), nullable=False)
+        batch_op.create_foreign_key('plugin_api_configuration_config_hash_fkey', 'plugin_config', ['config_hash'], ['hash'])
+        batch_op.create_index('ix_plugin_api_configuration_config_hash', ['config_hash'], unique=False)
+        batch_op.drop_column('config')
+
+
+def downgrade():
+    with op.batch_alter_table('plugin_api_configuration', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('config', sa.JSON(), nullable=True))
+
+    op.execute(
+        plugin_api_configuration.update()
+        .where(plugin_api_configuration.c.config_hash == plugin_config.c.hash)
+        .values(config=plugin_config.c.config)
+    )
+
+    with op.batch_alter_table('plugin_api_configuration', schema=None) as batch_op:
+        batch_op.alter_column('config', existing_type=sa.JSON(), nullable=False)
+        batch_op.drop_index('ix_plugin_api_configuration_config_hash')
+        batch_op.drop_constraint('plugin_api_configuration_config_hash_fkey', type_='foreignkey')
+        batch_op.drop_column('config_hash')
+
+    op.drop_table('plugin_config')
\ No newline at end of file